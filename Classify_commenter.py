@@ -1,14 +1,22 @@
 import asyncio
-from newspaper import Article
-from openai import OpenAI
-from dotenv import load_dotenv
 import os
 import json
+import orjson
 import logging
-import requests
+import re
+import time
+import hashlib
+import httpx
+import numpy as np
+import dataclasses
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 from enum import Enum
+from collections import OrderedDict
+from utils import CACHE_DIR, load_env, run
+from article_fetcher import fetch_article
+from semantic_cache import semantic_cached
+from llm_client import MODEL, SEED, chat_completion, get_client, stream_chat, truncate_tokens
 
 # Configure logging
 logging.basicConfig(
@@ -17,7 +25,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger('CommentVoiceMatcher')
 
-load_dotenv()
+load_env()
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
 
@@ -29,13 +37,51 @@ if not ELEVENLABS_API_KEY:
     logger.error("ElevenLabs API key not found in environment variables")
     raise ValueError("ElevenLabs API key not found")
 
+# How long the fetched ElevenLabs voices list stays valid on disk, in seconds
+VOICES_CACHE_TTL = int(os.getenv('SOA_VOICES_TTL', 24 * 60 * 60))
+
+# Voice description keywords that signal a given tone or speaking style
+_TONE_KEYWORDS: Dict[str, frozenset] = {
+    tone: frozenset(keywords)
+    for tone, keywords in {
+        'authoritative': ['authoritative', 'commanding', 'professional'],
+        'casual': ['casual', 'relaxed', 'friendly'],
+        'energetic': ['energetic', 'dynamic', 'lively'],
+        'formal': ['formal', 'serious', 'proper'],
+        'caring': ['warm', 'caring', 'gentle', 'nurturing'],
+        'passionate': ['passionate', 'enthusiastic', 'driven'],
+        'analytical': ['analytical', 'precise', 'detailed'],
+        'engaging': ['engaging', 'interactive', 'approachable']
+    }.items()
+}
+_STYLE_KEYWORDS: Dict[str, frozenset] = {
+    style: frozenset(keywords)
+    for style, keywords in {
+        'formal': ['formal', 'professional', 'proper'],
+        'conversational': ['conversational', 'natural', 'friendly'],
+        'passionate': ['passionate', 'enthusiastic', 'energetic'],
+        'academic': ['academic', 'scholarly', 'educational'],
+        'journalistic': ['journalistic', 'news', 'reporting'],
+        'storytelling': ['narrative', 'storytelling', 'engaging']
+    }.items()
+}
+
+# In-process LRU of analyzed perspectives keyed by the normalized perspective string.
+# A coroutine function can't use functools.lru_cache, and the semantic cache behind it
+# already persists results across restarts.
+PERSONA_MEMO_SIZE = 2048
+_persona_memo: "OrderedDict[str, CommentPersona]" = OrderedDict()
+
+# Pipeline state of in-flight Batch API jobs, keyed by batch id
+BATCH_STATE_DIR = os.path.join(CACHE_DIR, "batches")
+
 class VoiceCategory(str, Enum):
     """Voice categories from ElevenLabs"""
     PREMADE = "premade"
     PROFESSIONAL = "professional"
     GENERATED = "generated"
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Voice:
     """Represents a voice with its characteristics"""
     voice_id: str
@@ -48,6 +94,7 @@ class Voice:
     description: Optional[str]
     preview_url: str
     
+    # Voices are identified by voice_id alone
     def __hash__(self):
         return hash(self.voice_id)
     
@@ -70,7 +117,7 @@ class Voice:
             'preview_url': self.preview_url
         }
 
-@dataclass
+@dataclass(slots=True)
 class CommentPersona:
     """Represents a commenter's persona and voice requirements"""
     perspective: str
@@ -83,23 +130,58 @@ class CommentPersona:
     accent_preference: Optional[str] = None
 
 class CommentVoiceMatcher:
+    MATCH_WEIGHTS = {
+        'age': 0.2,
+        'gender': 0.15,
+        'accent': 0.1,
+        'expertise': 0.2,
+        'tone': 0.2,
+        'speaking_style': 0.15
+    }
+
     def __init__(self):
-        """Initialize the voice matcher with API clients"""
+        """Initialize the voice matcher with API clients; the voices are fetched by ready()"""
         logger.info("Initializing CommentVoiceMatcher")
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
-        self.voices = self._fetch_voices()
-        logger.info(f"Successfully fetched {len(self.voices)} voices")
+        # The process-wide pooled client, so concurrent requests reuse keep-alive connections
+        self.client = get_client()
+        # Keep-alive HTTP/2 client for the ElevenLabs API so repeat requests share one connection
+        self._http = httpx.AsyncClient(
+            http2=True,
+            timeout=10.0,
+            headers={"xi-api-key": ELEVENLABS_API_KEY},
+            limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
+        )
+        self._voices: Optional[List[Voice]] = None
+        self._voices_lock = asyncio.Lock()
+        self._index_voices()
+
+    @classmethod
+    async def create(cls) -> "CommentVoiceMatcher":
+        """Create a voice matcher and wait until its voices are fetched"""
+        matcher = cls()
+        await matcher.ready()
+        return matcher
+
+    async def ready(self):
+        """Fetch and index the available voices on first call; later calls return immediately"""
+        if self._voices is not None:
+            return
+        async with self._voices_lock:
+            if self._voices is None:
+                self._voices = await self._fetch_voices()
+                self._index_voices()
+                logger.info(f"Successfully fetched {len(self._voices)} voices")
     
-    def _fetch_voices(self) -> List[Voice]:
-        """Fetch all available voices from ElevenLabs API"""
+    async def _fetch_voices(self) -> List[Voice]:
+        """Fetch all available voices from ElevenLabs API, preferring the local disk cache"""
         try:
-            response = requests.get(
-                "https://api.elevenlabs.io/v1/voices",
-                headers={"xi-api-key": ELEVENLABS_API_KEY}
-            )
-            response.raise_for_status()
-            
-            voices_data = response.json()["voices"]
+            voices_data = self._load_cached_voices()
+            if voices_data is None:
+                response = await self._http.get("https://api.elevenlabs.io/v1/voices")
+                response.raise_for_status()
+                
+                voices_data = response.json()["voices"]
+                self._store_cached_voices(voices_data)
             return [
                 Voice(
                     voice_id=voice["voice_id"],
@@ -117,145 +199,358 @@ class CommentVoiceMatcher:
         except Exception as e:
             logger.error(f"Error fetching voices: {e}")
             raise
+
+    def _voices_cache_path(self) -> str:
+        """Path of the cached voices list, keyed by a hash of the ElevenLabs API key"""
+        key_hash = hashlib.sha256(ELEVENLABS_API_KEY.encode()).hexdigest()[:16]
+        return os.path.join(CACHE_DIR, f"voices_{key_hash}.json")
+
+    def _load_cached_voices(self) -> Optional[List[dict]]:
+        """Return the cached raw voices data if it is younger than the TTL"""
+        path = self._voices_cache_path()
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if age >= VOICES_CACHE_TTL:
+                return None
+            with open(path, "rb") as cache_file:
+                voices_data = orjson.loads(cache_file.read())
+            logger.info(f"Loaded {len(voices_data)} voices from cache ({age:.0f}s old)")
+            return voices_data
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable voices cache: {e}")
+            return None
+
+    def _store_cached_voices(self, voices_data: List[dict]):
+        """Atomically write the raw voices data to the disk cache"""
+        path = self._voices_cache_path()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(tmp_path, "wb") as cache_file:
+                cache_file.write(orjson.dumps(voices_data))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write voices cache: {e}")
         
-    async def get_relevant_perspectives(self, article_text):
-        """Determine the most relevant perspectives for commenting on this specific article."""
-        logger.info("Getting relevant perspectives for article")
+    # Chat completion request bodies, shared by the live calls and the Batch API path
+
+    def _summary_request(self, article_text: str) -> dict:
+        return {
+            "model": MODEL,
+            "seed": SEED,
+            "temperature": 0,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f"Summarize this news article briefly keep the length less than 30 seconds of speech:\n{article_text}"
+                }
+            ],
+            # 30 seconds of speech is roughly 80 words
+            "max_tokens": 150
+        }
+
+    def _personas_request(self, summary: str) -> dict:
+        return {
+            "model": MODEL,
+            "seed": SEED,
+            "temperature": 0,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f"""Based on this news article summary, determine the 4-5 most relevant perspectives or stakeholders 
+                    who would have interesting and diverse viewpoints on this topic, and the ideal voice characteristics 
+                    for each of them.
+                    
+                    Article summary: {summary}
+                    
+                    Consider factors like:
+                    - The main topic and field (tech, politics, sports, etc.)
+                    - Key stakeholders mentioned or affected
+                    - Relevant expert viewpoints needed
+                    - Potential opposing viewpoints
+                    - Local vs global perspectives if relevant
+                    
+                    Return a JSON object with a "personas" array of 4-5 objects, each with these fields:
+                    - perspective: a specific type of commenter (e.g., "Tech Industry Expert", "Privacy Advocate", etc.)
+                    - age_range: "young", "middle-aged", or "old"
+                    - gender: "male" or "female"
+                    - tone: describe the ideal tone (e.g., "authoritative", "casual", "energetic")
+                    - expertise_level: "expert", "enthusiast", or "general"
+                    - background: type of background (e.g., "academic", "industry", "activist")
+                    - speaking_style: how they would speak (e.g., "formal", "conversational", "passionate")
+                    - accent_preference: preferred accent if relevant (e.g., "british", "american", "australian"), or null if no preference
+                    
+                    Return only the JSON object, no other text."""
+                }
+            ],
+            "response_format": {"type": "json_object"},
+            "max_tokens": 600
+        }
+
+    def _perspective_analysis_request(self, perspective: str) -> dict:
+        return {
+            "model": MODEL,
+            "seed": SEED,
+            "temperature": 0,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f'''Analyze this commenter perspective and determine the ideal voice characteristics.
+                    Return a JSON object with these fields:
+                    - age_range: "young", "middle-aged", or "old"
+                    - gender: "male" or "female"
+                    - tone: describe the ideal tone (e.g., "authoritative", "casual", "energetic")
+                    - expertise_level: "expert", "enthusiast", or "general"
+                    - background: type of background (e.g., "academic", "industry", "activist")
+                    - speaking_style: how they would speak (e.g., "formal", "conversational", "passionate")
+                    - accent_preference: preferred accent if relevant (e.g., "british", "american", "australian"), or null if no preference
+                    
+                    Perspective: {perspective}
+                    
+                    Consider the perspective's implied:
+                    - Professional background
+                    - Level of expertise
+                    - Typical age range
+                    - Communication style
+                    - Cultural context
+                    
+                    Return only the JSON object, no other text.'''
+                }
+            ],
+            "response_format": {"type": "json_object"},
+            "max_tokens": 200
+        }
+
+    def _summary_voices_request(self, title: str, summary: str, styled_summary: str, style: str) -> dict:
+        return {
+            "model": MODEL,
+            "seed": SEED,
+            "temperature": 0,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f'''Analyze this news title with its original summary and its {style} style rewrite to 
+                    determine the ideal voice characteristics for narrating each of the two summaries.
+                    Consider the content's tone, subject matter, and emotional impact.
+                    
+                    Title: {title}
+                    Original summary: {summary}
+                    Styled summary: {styled_summary}
+                    Style: {style}
+                    
+                    Return a JSON object with an "original" and a "styled" object, each with these fields:
+                    - age_range: "young", "middle-aged", or "old"
+                    - gender: "male" or "female"
+                    - tone: describe the ideal tone (e.g., "authoritative", "empathetic", "energetic", "serious", "casual", "dramatic")
+                    - expertise_level: "expert", "enthusiast", or "general"
+                    - background: type of background (e.g., "journalistic", "sports", "tech", "entertainment")
+                    - speaking_style: how they should speak (e.g., "formal", "conversational", "passionate", "narrative")
+                    - accent_preference: preferred accent if content suggests one (e.g., "british", "american", "australian"), or null if no preference
+                    
+                    Consider factors like:
+                    - Is this breaking news, analysis, or feature story?
+                    - What's the emotional tone (serious, upbeat, dramatic)?
+                    - Is this general news or specialized content?
+                    - Does the content suggest a particular cultural context?
+                    - How should the style ({style}) influence the voice of the styled summary?
+                    
+                    Return only the JSON object, no other text.'''
+                }
+            ],
+            "response_format": {"type": "json_object"},
+            "max_tokens": 400
+        }
+
+    def _comment_request(self, perspective: str, summary: str, style: str) -> dict:
+        return {
+            "model": MODEL,
+            "seed": SEED,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f"""As a {perspective}, provide a comment on this news in a {style} style:
+                    
+                    Article Summary: {summary}
+                    
+                    Write your comment in {style} style while maintaining the authenticity of your perspective.
+                    For example, if the style is 'RAP' and you're a tech expert, write like a world famous wrapper
+                    discussing technology. If the style is 'poetic' and you're a political analyst, write a poetic
+                    analysis of the political situation.
+                    
+                    Make it creative and entertaining while still providing meaningful insights from your perspective. 
+                    The output will be used for text to speech so make minor adjustments accordingly to make it sound 
+                    like natural human speech."""
+                }
+            ],
+            "max_tokens": 400
+        }
+
+    def _comments_request(self, perspectives: List[str], summary: str, style: str) -> dict:
+        return {
+            "model": MODEL,
+            "seed": SEED,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f"""For each perspective in this list, provide a comment on this news in a {style} style,
+                    written as someone holding that perspective.
+                    
+                    Perspectives: {json.dumps(perspectives)}
+                    
+                    Article Summary: {summary}
+                    
+                    Write every comment in {style} style while maintaining the authenticity of its perspective.
+                    For example, if the style is 'RAP' and the perspective is a tech expert, write like a world famous wrapper
+                    discussing technology. If the style is 'poetic' and the perspective is a political analyst, write a poetic
+                    analysis of the political situation.
+                    
+                    Make them creative and entertaining while still providing meaningful insights from each perspective. 
+                    The output will be used for text to speech so make minor adjustments accordingly to make it sound 
+                    like natural human speech.
+                    
+                    Return a JSON object mapping each perspective string, exactly as given, to its comment string."""
+                }
+            ],
+            "response_format": {"type": "json_object"},
+            "max_tokens": 400 * len(perspectives)
+        }
+
+    def _styled_summary_request(self, summary: str, style: str) -> dict:
+        return {
+            "model": MODEL,
+            "seed": SEED,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f"Rewrite this news summary in {style} style:\n{summary}"
+                }
+            ],
+            # The same length as the summary it rewrites
+            "max_tokens": 180
+        }
+
+    @staticmethod
+    def _parse_personas(content: str) -> Tuple[List[CommentPersona], List[str]]:
+        """
+        Parse a personas response into the complete personas and the perspectives
+        whose voice characteristics are missing or malformed, in response order.
+        """
+        personas, incomplete = [], []
+        for item in orjson.loads(content)["personas"]:
+            try:
+                personas.append(CommentVoiceMatcher._persona_from_dict(item["perspective"], item))
+            except (TypeError, KeyError):
+                if isinstance(item, dict) and isinstance(item.get("perspective"), str):
+                    incomplete.append(item["perspective"])
+        return personas, incomplete
+
+    @staticmethod
+    def _persona_from_json(perspective: str, content: str) -> CommentPersona:
+        """Build a persona from a voice characteristics JSON response"""
+        return CommentVoiceMatcher._persona_from_dict(perspective, orjson.loads(content))
+
+    @staticmethod
+    def _persona_from_dict(perspective: str, characteristics: dict) -> CommentPersona:
+        return CommentPersona(
+            perspective=perspective,
+            age_range=characteristics["age_range"],
+            gender=characteristics["gender"],
+            tone=characteristics["tone"],
+            expertise_level=characteristics["expertise_level"],
+            background=characteristics["background"],
+            speaking_style=characteristics["speaking_style"],
+            accent_preference=characteristics.get("accent_preference")
+        )
+
+    async def _stream_completion(self, request: dict) -> str:
+        """Run a chat completion with streaming and return the accumulated message content"""
+        return await stream_chat(self.client, **request)
+
+    @semantic_cached(threshold=0.95, result_type=CommentPersona)
+    async def get_relevant_personas(self, summary) -> List[CommentPersona]:
+        """Determine the most relevant perspectives on this article together with their voice characteristics."""
+        logger.info("Getting relevant personas for article")
         try:
-            perspective_response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"""Based on this news article, determine the 4-5 most relevant perspectives or stakeholders 
-                        who would have interesting and diverse viewpoints on this topic. Return the result as a JSON array of 
-                        strings, where each string is a specific type of commenter (e.g., "Tech Industry Expert", "Privacy Advocate", etc.).
-                        
-                        Article text: {article_text}
-                        
-                        Consider factors like:
-                        - The main topic and field (tech, politics, sports, etc.)
-                        - Key stakeholders mentioned or affected
-                        - Relevant expert viewpoints needed
-                        - Potential opposing viewpoints
-                        - Local vs global perspectives if relevant
-                        
-                        Return only the JSON array, no other text."""
-                    }
-                ]
-            )
-            
-            perspectives = json.loads(perspective_response.choices[0].message.content)
-            logger.info(f"Generated {len(perspectives)} perspectives: {perspectives}")
-            return perspectives
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse perspectives JSON: {e}")
-            logger.debug(f"Raw response: {perspective_response.choices[0].message.content}")
+            content = await self._stream_completion(self._personas_request(summary))
+            personas, incomplete = self._parse_personas(content)
+            if incomplete:
+                logger.warning(f"Analyzing {len(incomplete)} incomplete personas individually")
+                personas += await asyncio.gather(*(self.analyze_perspective(p) for p in incomplete))
+            logger.info(f"Generated {len(personas)} personas: {[persona.perspective for persona in personas]}")
+            return personas
+        except orjson.JSONDecodeError as e:
+            logger.error(f"Failed to parse personas JSON: {e}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Raw response: {content}")
             raise
         except Exception as e:
-            logger.error(f"Error getting perspectives: {e}")
+            logger.error(f"Error getting personas: {e}")
             raise
 
-    def analyze_perspective(self, perspective: str) -> CommentPersona:
-        """Analyze a perspective to determine the ideal voice characteristics"""
+    async def analyze_perspective(self, perspective: str) -> CommentPersona:
+        """Analyze a single perspective to determine the ideal voice characteristics"""
+        # The same perspectives recur across articles, so memoize on the normalized string
+        key = perspective.strip().lower()
+        persona = _persona_memo.get(key)
+        if persona is None:
+            persona = await self._analyze_perspective(perspective)
+            _persona_memo[key] = persona
+            if len(_persona_memo) > PERSONA_MEMO_SIZE:
+                _persona_memo.popitem(last=False)
+        else:
+            _persona_memo.move_to_end(key)
+        # A cache hit may come from a similarly worded perspective
+        return dataclasses.replace(persona, perspective=perspective)
+
+    @semantic_cached(threshold=0.95, result_type=CommentPersona)
+    async def _analyze_perspective(self, perspective: str) -> CommentPersona:
         logger.info(f"Analyzing perspective: {perspective}")
         try:
-            analysis_response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f'''Analyze this commenter perspective and determine the ideal voice characteristics.
-                        Return a JSON object with these fields:
-                        - age_range: "young", "middle-aged", or "old"
-                        - gender: "male" or "female"
-                        - tone: describe the ideal tone (e.g., "authoritative", "casual", "energetic")
-                        - expertise_level: "expert", "enthusiast", or "general"
-                        - background: type of background (e.g., "academic", "industry", "activist")
-                        - speaking_style: how they would speak (e.g., "formal", "conversational", "passionate")
-                        - accent_preference: preferred accent if relevant (e.g., "british", "american", "australian"), or null if no preference
-                        
-                        Perspective: {perspective}
-                        
-                        Consider the perspective's implied:
-                        - Professional background
-                        - Level of expertise
-                        - Typical age range
-                        - Communication style
-                        - Cultural context
-                        
-                        Return only the JSON object, no other text.'''
-                    }
-                ]
-            )
-            
-            characteristics = json.loads(analysis_response.choices[0].message.content)
-            return CommentPersona(
-                perspective=perspective,
-                age_range=characteristics["age_range"],
-                gender=characteristics["gender"],
-                tone=characteristics["tone"],
-                expertise_level=characteristics["expertise_level"],
-                background=characteristics["background"],
-                speaking_style=characteristics["speaking_style"],
-                accent_preference=characteristics.get("accent_preference")
+            analysis_response = await chat_completion(
+                self.client, **self._perspective_analysis_request(perspective)
             )
+            return self._persona_from_json(perspective, analysis_response.choices[0].message.content)
         except Exception as e:
             logger.error(f"Error analyzing perspective: {e}")
             raise
 
-    async def _analyze_summary_voice_requirements(self, title: str, summary: str, style: str) -> CommentPersona:
-        """Analyze the title and summary to determine ideal voice characteristics"""
-        logger.info("Analyzing summary voice requirements")
+    async def _analyze_two_summaries(self, title: str, summary: str, styled_summary: str,
+                                     style: str) -> Tuple[CommentPersona, CommentPersona]:
+        """Determine the ideal narrator voice for both the original and the styled summary in one request"""
         try:
-            analysis_response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f'''Analyze this news title and summary to determine the ideal voice characteristics for narration.
-                        Consider the content's tone, subject matter, and emotional impact.
-                        
-                        Title: {title}
-                        Summary: {summary}
-                        Style: {style}
-                        
-                        Return a JSON object with these fields:
-                        - age_range: "young", "middle-aged", or "old"
-                        - gender: "male" or "female"
-                        - tone: describe the ideal tone (e.g., "authoritative", "empathetic", "energetic", "serious", "casual", "dramatic")
-                        - expertise_level: "expert", "enthusiast", or "general"
-                        - background: type of background (e.g., "journalistic", "sports", "tech", "entertainment")
-                        - speaking_style: how they should speak (e.g., "formal", "conversational", "passionate", "narrative")
-                        - accent_preference: preferred accent if content suggests one (e.g., "british", "american", "australian"), or null if no preference
-                        
-                        Consider factors like:
-                        - Is this breaking news, analysis, or feature story?
-                        - What's the emotional tone (serious, upbeat, dramatic)?
-                        - Is this general news or specialized content?
-                        - Does the content suggest a particular cultural context?
-                        - How should the style ({style}) influence the voice?
-                        
-                        Return only the JSON object, no other text.'''
-                    }
-                ]
-            )
-            
-            characteristics = json.loads(analysis_response.choices[0].message.content)
-            return CommentPersona(
-                perspective="News Narrator",
-                age_range=characteristics["age_range"],
-                gender=characteristics["gender"],
-                tone=characteristics["tone"],
-                expertise_level=characteristics["expertise_level"],
-                background=characteristics["background"],
-                speaking_style=characteristics["speaking_style"],
-                accent_preference=characteristics.get("accent_preference")
+            summary_persona, styled_summary_persona = await self._request_summary_voices(
+                title, summary, styled_summary, style
             )
+            return summary_persona, styled_summary_persona
         except Exception as e:
             logger.error(f"Error analyzing summary voice requirements: {e}")
             # Fallback to default persona if analysis fails
-            return self._create_default_summary_persona(style)
+            default_persona = self._create_default_summary_persona(style)
+            return default_persona, default_persona
+
+    @semantic_cached(
+        threshold=0.95,
+        key=lambda title, summary, styled_summary, style: f"{title}\n{summary}\n{styled_summary}",
+        scope=lambda title, summary, styled_summary, style: style.lower(),
+        result_type=CommentPersona
+    )
+    async def _request_summary_voices(self, title: str, summary: str, styled_summary: str,
+                                      style: str) -> Tuple[CommentPersona, CommentPersona]:
+        logger.info("Analyzing summary voice requirements")
+        analysis_response = await chat_completion(
+            self.client, **self._summary_voices_request(title, summary, styled_summary, style)
+        )
+        return self._summary_personas_from_json(analysis_response.choices[0].message.content)
+
+    def _summary_personas_from_json(self, content: str) -> Tuple[CommentPersona, CommentPersona]:
+        """Build the (original, styled) narrator personas from a summary voices JSON response"""
+        characteristics = orjson.loads(content)
+        return (
+            self._persona_from_dict("News Narrator", characteristics["original"]),
+            self._persona_from_dict("News Narrator", characteristics["styled"])
+        )
 
     def _create_default_summary_persona(self, style: str) -> CommentPersona:
         """Create a default persona for the summary voice if analysis fails"""
@@ -286,82 +581,83 @@ class CommentVoiceMatcher:
         """Match a voice to a commenter persona, returns list of (voice, score) tuples"""
         logger.info(f"Matching voice for persona: {persona.perspective}")
         
-        matched_voices = []
-        for voice in self.voices:
-            score = self._calculate_voice_match_score(voice, persona)
-            if score > 0.5:  # Only include voices with >50% match
-                matched_voices.append((voice, score))
+        scores = self._score_voices(persona)
         
-        # Sort by score descending
-        matched_voices.sort(key=lambda x: x[1], reverse=True)
-        return matched_voices[:5]  # Return top 5 matches
-
-    def _calculate_voice_match_score(self, voice: Voice, persona: CommentPersona) -> float:
-        """Calculate how well a voice matches a persona"""
-        score = 0.0
-        weights = {
-            'age': 0.2,
-            'gender': 0.15,
-            'accent': 0.1,
-            'expertise': 0.2,
-            'tone': 0.2,
-            'speaking_style': 0.15
+        # Only consider voices with >50% match, then select the top 5 of those without
+        # sorting every candidate and order just those by score
+        candidates = np.flatnonzero(scores > 0.5)
+        if len(candidates) > 5:
+            candidates = candidates[np.argpartition(-scores[candidates], 5)[:5]]
+        top_idx = candidates[np.lexsort((candidates, -scores[candidates]))]
+
+        return [(self._voices[i], float(scores[i])) for i in top_idx]
+
+    def find_best_matching_voice(self, persona: CommentPersona) -> Optional[Voice]:
+        """Return the best scoring voice for a persona, or None if no voice matches well enough"""
+        matches = self.match_voice_to_persona(persona)
+        return matches[0][0] if matches else None
+
+    def _index_voices(self):
+        """
+        Precompute normalized per-voice features as parallel arrays for scoring.
+        Voice metadata doesn't change after the fetch, so this runs once per voices list.
+        """
+        voices = self._voices or []
+        self._voice_age_label = np.array([v.age.lower() for v in voices], dtype=str)
+        self._voice_age = np.array([self._age_to_number(v.age) for v in voices], dtype=np.int8)
+        self._voice_gender = np.array([v.gender.lower() for v in voices], dtype=str)
+        self._voice_accent = np.array([v.accent.lower() for v in voices], dtype=str)
+        self._voice_expertise = np.array([self._determine_voice_expertise(v) for v in voices], dtype=str)
+        
+        # Boolean masks of which voice descriptions mention each tone / speaking style
+        desc_tokens = [frozenset(re.findall(r"[a-z]+", (v.description or "").lower())) for v in voices]
+        self._tone_match = {
+            tone: np.array([not tokens.isdisjoint(keywords) for tokens in desc_tokens], dtype=bool)
+            for tone, keywords in _TONE_KEYWORDS.items()
         }
+        self._style_match = {
+            style: np.array([not tokens.isdisjoint(keywords) for tokens in desc_tokens], dtype=bool)
+            for style, keywords in _STYLE_KEYWORDS.items()
+        }
+
+    def _score_voices(self, persona: CommentPersona) -> np.ndarray:
+        """Calculate how well every voice matches a persona in one vectorized pass"""
+        weights = self.MATCH_WEIGHTS
         
         # Age match
-        if voice.age.lower() == persona.age_range:
-            score += weights['age']
-        elif abs(self._age_to_number(voice.age) - self._age_to_number(persona.age_range)) == 1:
-            score += weights['age'] * 0.5
+        age_distance = np.abs(self._voice_age - self._age_to_number(persona.age_range))
+        scores = np.where(
+            self._voice_age_label == persona.age_range,
+            weights['age'],
+            np.where(age_distance == 1, weights['age'] * 0.5, 0.0)
+        )
         
         # Gender match
-        if voice.gender.lower() == persona.gender.lower():
-            score += weights['gender']
+        scores += (self._voice_gender == persona.gender.lower()) * weights['gender']
         
         # Accent match
         if persona.accent_preference:
-            if voice.accent.lower() == persona.accent_preference.lower():
-                score += weights['accent']
+            scores += (self._voice_accent == persona.accent_preference.lower()) * weights['accent']
         else:
-            score += weights['accent']  # No preference means any accent is fine
+            scores += weights['accent']  # No preference means any accent is fine
         
         # Expertise level match
-        voice_expertise = self._determine_voice_expertise(voice)
-        if voice_expertise == persona.expertise_level:
-            score += weights['expertise']
-        elif voice_expertise in ['expert'] and persona.expertise_level in ['enthusiast']:
-            score += weights['expertise'] * 0.7
+        expertise_score = (self._voice_expertise == persona.expertise_level) * weights['expertise']
+        if persona.expertise_level == 'enthusiast':
+            expertise_score = np.where(
+                self._voice_expertise == 'expert', weights['expertise'] * 0.7, expertise_score
+            )
+        scores += expertise_score
         
         # Tone and speaking style match
-        description = voice.description.lower() if voice.description else ""
-        
-        # Tone matching
-        tone_keywords = {
-            'authoritative': ['authoritative', 'commanding', 'professional'],
-            'casual': ['casual', 'relaxed', 'friendly'],
-            'energetic': ['energetic', 'dynamic', 'lively'],
-            'formal': ['formal', 'serious', 'proper'],
-            'caring': ['warm', 'caring', 'gentle', 'nurturing'],
-            'passionate': ['passionate', 'enthusiastic', 'driven'],
-            'analytical': ['analytical', 'precise', 'detailed'],
-            'engaging': ['engaging', 'interactive', 'approachable']
-        }
-        if any(keyword in description for keyword in tone_keywords.get(persona.tone.lower(), [])):
-            score += weights['tone']
+        tone_match = self._tone_match.get(persona.tone.lower())
+        if tone_match is not None:
+            scores += tone_match * weights['tone']
+        style_match = self._style_match.get(persona.speaking_style.lower())
+        if style_match is not None:
+            scores += style_match * weights['speaking_style']
         
-        # Speaking style matching
-        style_keywords = {
-            'formal': ['formal', 'professional', 'proper'],
-            'conversational': ['conversational', 'natural', 'friendly'],
-            'passionate': ['passionate', 'enthusiastic', 'energetic'],
-            'academic': ['academic', 'scholarly', 'educational'],
-            'journalistic': ['journalistic', 'news', 'reporting'],
-            'storytelling': ['narrative', 'storytelling', 'engaging']
-        }
-        if any(keyword in description for keyword in style_keywords.get(persona.speaking_style.lower(), [])):
-            score += weights['speaking_style']
-        
-        return score
+        return scores
 
     def _age_to_number(self, age: str) -> int:
         """Convert age category to number for comparison"""
@@ -374,127 +670,283 @@ class CommentVoiceMatcher:
         return age_map.get(age.lower(), 2)
 
     def _determine_voice_expertise(self, voice: Voice) -> str:
-        """Determine expertise level from voice characteristics"""
+        """Determine expertise level from voice characteristics; only called while indexing the voices"""
         if voice.category.lower() == "professional":
             return "expert"
-        if voice.description and "expert" in voice.description.lower():
+        description = (voice.description or "").lower()
+        if "expert" in description:
             return "expert"
-        if voice.description and "enthusiast" in voice.description.lower():
+        if "enthusiast" in description:
             return "enthusiast"
         return "general"
 
-    async def analyze_and_style_article(self, url, style):
+    async def _gen_comment(self, perspective: str, summary: str, style: str) -> str:
+        """Generate a styled comment on the summary from a single perspective"""
+        logger.info(f"Generating comment for perspective: {perspective}")
+        comment_response = await chat_completion(
+            self.client, **self._comment_request(perspective, summary, style)
+        )
+        return comment_response.choices[0].message.content
+
+    async def _gen_comments(self, perspectives: List[str], summary: str, style: str) -> Dict[str, str]:
+        """Generate styled comments for all perspectives in a single request"""
+        logger.info(f"Generating comments for {len(perspectives)} perspectives in one request")
+        comments_response = await chat_completion(
+            self.client, **self._comments_request(perspectives, summary, style)
+        )
+        comments = self._parse_comments(comments_response.choices[0].message.content)
+        return await self._fill_missing_comments(comments, perspectives, summary, style)
+
+    @staticmethod
+    def _parse_comments(content: Optional[str]) -> Dict[str, str]:
+        """Parse a batched comments response, returning an empty mapping if it is unusable"""
+        try:
+            comments = orjson.loads(content)
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"Failed to parse batched comments JSON, generating them one by one: {e}")
+            return {}
+        return comments if isinstance(comments, dict) else {}
+
+    async def _fill_missing_comments(self, comments: Dict[str, str], perspectives: List[str],
+                                     summary: str, style: str) -> Dict[str, str]:
+        """Fall back to individual requests for any perspective the batched response is missing"""
+        missing = [p for p in perspectives if not isinstance(comments.get(p), str)]
+        if missing:
+            missing_comments = await asyncio.gather(*(self._gen_comment(p, summary, style) for p in missing))
+            comments = {**comments, **dict(zip(missing, missing_comments))}
+        return {perspective: comments[perspective] for perspective in perspectives}
+
+    async def _gen_styled_summary(self, summary: str, style: str) -> str:
+        """Rewrite the summary in the requested style"""
+        logger.info("Generating styled summary")
+        styled_summary_response = await chat_completion(
+            self.client, **self._styled_summary_request(summary, style)
+        )
+        return styled_summary_response.choices[0].message.content
+
+    async def _styled_summary_chain(self, title: str, summary: str,
+                                    style: str) -> Tuple[str, CommentPersona, CommentPersona]:
+        """Generate the styled summary, then analyze the voices both summaries need"""
+        styled_summary = await self._gen_styled_summary(summary, style)
+        summary_persona, styled_summary_persona = await self._analyze_two_summaries(
+            title, summary, styled_summary, style
+        )
+        return styled_summary, summary_persona, styled_summary_persona
+
+    async def _perspectives_chain(self, summary: str,
+                                  style: str) -> Tuple[List[str], Dict[str, str], List[CommentPersona]]:
+        """Pick perspectives along with their personas from the summary, then generate their comments"""
+        personas = await self.get_relevant_personas(summary)
+        perspectives = [persona.perspective for persona in personas]
+        logger.info("Generating styled comments for each perspective")
+        comments = await self._gen_comments(perspectives, summary, style)
+        return perspectives, comments, personas
+
+    def _assemble_result(self, title: str, summary: str, styled_summary: str, perspectives: List[str],
+                         comments: Dict[str, str], personas: List[CommentPersona],
+                         summary_persona: CommentPersona, styled_summary_persona: CommentPersona) -> dict:
+        """Match voices to every persona and build the analysis result"""
+        logger.info(f"Selected summary persona: {summary_persona}")
+        summary_voices = self.match_voice_to_persona(summary_persona)
+        summary_voice_matches = [(voice.to_dict(), score) for voice, score in summary_voices]
+        
+        debug = logger.isEnabledFor(logging.DEBUG)
+        voice_matches = {}
+        for perspective, persona in zip(perspectives, personas):
+            # Match voice to perspective
+            matching_voices = self.match_voice_to_persona(persona)
+            voice_matches[perspective] = [(voice.to_dict(), score) for voice, score in matching_voices]
+            
+            if debug:
+                logger.debug(f"Generated comment for {perspective}: {comments[perspective][:100]}...")
+                logger.debug(f"Found {len(matching_voices)} voice matches for {perspective}")
+        
+        # Match voice for styled summary
+        logger.info("Matching voice for styled summary")
+        styled_summary_voices = self.match_voice_to_persona(styled_summary_persona)
+        styled_summary_voice_matches = [(voice.to_dict(), score) for voice, score in styled_summary_voices]
+        
+        return {
+            "title": title,
+            "original_summary": summary,
+            "summary_voice_matches": summary_voice_matches,
+            "styled_summary": styled_summary,
+            "styled_summary_voice_matches": styled_summary_voice_matches,
+            "perspectives_chosen": perspectives,
+            "styled_comments": comments,
+            "voice_matches": voice_matches
+        }
+
+    async def analyze_and_style_article(self, article, style, batch_mode=False):
+        """
+        Summarize, style and comment on an article and match voices to each part.
+        The article is either a URL or an ArticleContent from article_fetcher.fetch_article.
+        With batch_mode the LLM requests go through the OpenAI Batch API instead (half the
+        cost, completes within 24h): the returned dict only holds the batch_id, to be
+        passed to poll_and_assemble for the final result.
+        """
+        url = article if isinstance(article, str) else article.url
         logger.info(f"Starting analysis for URL: {url} with style: {style}")
         try:
-            # Download and parse article
-            logger.info("Downloading and parsing article")
-            article = Article(url)
-            article.download()
-            article.parse()
+            if isinstance(article, str):
+                logger.info("Downloading and parsing article")
+                article = await fetch_article(url)
             logger.info(f"Successfully parsed article: {article.title}")
+            article_text = truncate_tokens(article.text)
+            await self.ready()
+            
+            if batch_mode:
+                batch_id = await self._submit_batch(
+                    {"summary": self._summary_request(article_text)},
+                    {"stage": 1, "title": article.title, "style": style}
+                )
+                return {"batch_id": batch_id}
             
             # First get a basic summary
             logger.info("Generating basic summary")
-            summary_response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"Summarize this news article briefly keep the length less than 30 seconds of speech:\n{article.text}"
-                    }
-                ]
-            )
-            summary = summary_response.choices[0].message.content
-            logger.debug(f"Generated summary: {summary[:1000]}...")
+            summary = await self._stream_completion(self._summary_request(article_text))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Generated summary: {summary[:1000]}...")
             
-            # Match voice for the summary based on content analysis
-            logger.info("Analyzing and matching voice for summary")
-            summary_persona = await self._analyze_summary_voice_requirements(article.title, summary, style)
-            logger.info(f"Selected summary persona: {summary_persona}")
-            summary_voices = self.match_voice_to_persona(summary_persona)
-            summary_voice_matches = [(voice.to_dict(), score) for voice, score in summary_voices]
-            
-            # Get relevant perspectives for this specific article
-            logger.info("Getting perspectives for the article")
-            perspectives = await self.get_relevant_perspectives(article.text)
-            
-            # Generate styled comments from the determined perspectives and match voices
-            logger.info("Generating styled comments and matching voices for each perspective")
-            comments = {}
-            voice_matches = {}
-            
-            for perspective in perspectives:
-                logger.info(f"Processing perspective: {perspective}")
-                
-                # Generate styled comment
-                comment_response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": f"""As a {perspective}, provide a comment on this news in a {style} style:
-                            
-                            Article Summary: {summary}
-                            
-                            Write your comment in {style} style while maintaining the authenticity of your perspective.
-                            For example, if the style is 'RAP' and you're a tech expert, write like a world famous wrapper
-                            discussing technology. If the style is 'poetic' and you're a political analyst, write a poetic
-                            analysis of the political situation.
-                            
-                            Make it creative and entertaining while still providing meaningful insights from your perspective. 
-                            The output will be used for text to speech so make minor adjustments accordingly to make it sound 
-                            like natural human speech."""
-                        }
-                    ]
-                )
-                comments[perspective] = comment_response.choices[0].message.content
-                
-                # Match voice to perspective
-                persona = self.analyze_perspective(perspective)
-                matching_voices = self.match_voice_to_persona(persona)
-                voice_matches[perspective] = [(voice.to_dict(), score) for voice, score in matching_voices]
-                
-                logger.debug(f"Generated comment for {perspective}: {comments[perspective][:100]}...")
-                logger.debug(f"Found {len(matching_voices)} voice matches for {perspective}")
-            
-            # Also create a styled summary and match voice for it
-            logger.info("Generating styled summary")
-            styled_summary_response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"Rewrite this news summary in {style} style:\n{summary}"
-                    }
-                ]
+            # Everything else only depends on the summary. Run the independent chains
+            # concurrently so each step starts as soon as its own inputs are ready.
+            logger.info("Generating styled summary, summary voices and perspective comments")
+            (
+                (styled_summary, summary_persona, styled_summary_persona),
+                (perspectives, comments, personas)
+            ) = await asyncio.gather(
+                self._styled_summary_chain(article.title, summary, style),
+                self._perspectives_chain(summary, style)
             )
-            styled_summary = styled_summary_response.choices[0].message.content
-            
-            # Match voice for styled summary
-            logger.info("Matching voice for styled summary")
-            styled_summary_persona = await self._analyze_summary_voice_requirements(article.title, styled_summary, style)
-            styled_summary_voices = self.match_voice_to_persona(styled_summary_persona)
-            styled_summary_voice_matches = [(voice.to_dict(), score) for voice, score in styled_summary_voices]
             
-            result = {
-                "title": article.title,
-                "original_summary": summary,
-                "summary_voice_matches": summary_voice_matches,
-                "styled_summary": styled_summary,
-                "styled_summary_voice_matches": styled_summary_voice_matches,
-                "perspectives_chosen": perspectives,
-                "styled_comments": comments,
-                "voice_matches": voice_matches
-            }
+            result = self._assemble_result(
+                article.title, summary, styled_summary, perspectives, comments, personas,
+                summary_persona, styled_summary_persona
+            )
             
             logger.info("Successfully completed article analysis and styling")
-            logger.debug(f"Final result: {json.dumps(result, indent=2)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Final result: {orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()}")
             return result
             
         except Exception as e:
             logger.error(f"Error processing article: {str(e)}", exc_info=True)
             return f"Error processing article: {e}"
 
+    async def _submit_batch(self, requests: Dict[str, dict], state: dict) -> str:
+        """Submit chat requests keyed by custom_id as a Batch API job and persist the pipeline state"""
+        lines = [
+            orjson.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body})
+            for custom_id, body in requests.items()
+        ]
+        batch_file = await self.client.files.create(
+            file=("batch.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        os.makedirs(BATCH_STATE_DIR, exist_ok=True)
+        with open(os.path.join(BATCH_STATE_DIR, f"{batch.id}.json"), "wb") as state_file:
+            state_file.write(orjson.dumps(state))
+        logger.info(f"Submitted batch {batch.id} for stage {state['stage']} with {len(requests)} requests")
+        return batch.id
+
+    async def _wait_for_batch(self, batch_id: str, poll_interval: float) -> Dict[str, str]:
+        """Poll a batch until it completes and return the message content of each successful request"""
+        while True:
+            batch = await self.client.batches.retrieve(batch_id)
+            if batch.status == "completed":
+                break
+            if batch.status in ("failed", "expired", "cancelling", "cancelled"):
+                raise RuntimeError(f"Batch {batch_id} ended with status {batch.status}")
+            logger.info(f"Batch {batch_id} is {batch.status}, checking again in {poll_interval}s")
+            await asyncio.sleep(poll_interval)
+        
+        outputs = {}
+        if batch.output_file_id:
+            output_file = await self.client.files.content(batch.output_file_id)
+            for line in output_file.text.splitlines():
+                if not line.strip():
+                    continue
+                record = orjson.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") == 200:
+                    outputs[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+                else:
+                    logger.warning(f"Batch request {record['custom_id']} failed: {record.get('error')}")
+        return outputs
+
+    async def poll_and_assemble(self, batch_id: str, poll_interval: float = 60) -> dict:
+        """
+        Wait for a batch started by analyze_and_style_article(batch_mode=True) and return the
+        same result as the live path. Requests that depend on earlier outputs are submitted
+        as follow-up batches: the summary, then (styled summary, personas), then (comments,
+        voice analysis of both summaries). Voice matching runs locally at the end.
+        """
+        while True:
+            state_path = os.path.join(BATCH_STATE_DIR, f"{batch_id}.json")
+            with open(state_path, "rb") as state_file:
+                state = orjson.loads(state_file.read())
+            outputs = await self._wait_for_batch(batch_id, poll_interval)
+            title, style = state["title"], state["style"]
+            
+            if state["stage"] == 1:
+                if "summary" not in outputs:
+                    raise RuntimeError(f"Batch {batch_id} is missing the summary output")
+                summary = outputs["summary"]
+                state.update(stage=2, summary=summary)
+                requests = {
+                    "styled_summary": self._styled_summary_request(summary, style),
+                    "personas": self._personas_request(summary)
+                }
+            elif state["stage"] == 2:
+                if "styled_summary" not in outputs or "personas" not in outputs:
+                    raise RuntimeError(f"Batch {batch_id} is missing the styled summary or personas output")
+                summary, styled_summary = state["summary"], outputs["styled_summary"]
+                personas, incomplete = self._parse_personas(outputs["personas"])
+                # Anything that failed inside the batch falls back to the live path
+                personas += await asyncio.gather(*(self.analyze_perspective(p) for p in incomplete))
+                perspectives = [persona.perspective for persona in personas]
+                state.update(stage=3, styled_summary=styled_summary, perspectives=perspectives, personas=personas)
+                requests = {
+                    "comments": self._comments_request(perspectives, summary, style),
+                    "summary_voices": self._summary_voices_request(title, summary, styled_summary, style)
+                }
+            else:
+                summary, styled_summary = state["summary"], state["styled_summary"]
+                perspectives = state["perspectives"]
+                
+                # Anything that failed inside the batch falls back to the live path
+                comments = await self._fill_missing_comments(
+                    self._parse_comments(outputs.get("comments")), perspectives, summary, style
+                )
+                personas = [CommentPersona(**persona) for persona in state["personas"]]
+                await self.ready()
+                summary_persona, styled_summary_persona = self._summary_personas_from_output(
+                    outputs.get("summary_voices"), style
+                )
+                
+                os.remove(state_path)
+                return self._assemble_result(
+                    title, summary, styled_summary, perspectives, comments, personas,
+                    summary_persona, styled_summary_persona
+                )
+            
+            batch_id = await self._submit_batch(requests, state)
+            os.remove(state_path)
+
+    def _summary_personas_from_output(self, content: Optional[str],
+                                      style: str) -> Tuple[CommentPersona, CommentPersona]:
+        try:
+            return self._summary_personas_from_json(content)
+        except (TypeError, ValueError, KeyError) as e:
+            logger.error(f"Error analyzing summary voice requirements: {e}")
+            default_persona = self._create_default_summary_persona(style)
+            return default_persona, default_persona
+
 async def main():
     logger.info("Starting main function")
     try:
@@ -503,8 +955,13 @@ async def main():
         style = input("\nEnter your preferred style: ")
         logger.info(f"User input - URL: {url}, Style: {style}")
         
+        # Fetching the voices and downloading the article are independent, so overlap them
         matcher = CommentVoiceMatcher()
-        result = await matcher.analyze_and_style_article(url, style)
+        _, article = await asyncio.gather(
+            matcher.ready(),
+            fetch_article(url)
+        )
+        result = await matcher.analyze_and_style_article(article, style)
         
         if isinstance(result, dict):
             logger.info("Successfully processed article")
@@ -552,4 +1009,4 @@ async def main():
         print(f"An error occurred: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
@@ -1,9 +1,6 @@
-import asyncio
-from newspaper import Article
-from openai import OpenAI
-from dotenv import load_dotenv
-import os
 import logging
+import news_pipeline
+from utils import run
 
 # Configure logging
 logging.basicConfig(
@@ -12,67 +9,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger('StyleTranslator')
 
-load_dotenv()
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-if not OPENAI_API_KEY:
-    logger.error("OpenAI API key not found in environment variables")
-    raise ValueError("OpenAI API key not found")
-
 class StyleTranslator:
     def __init__(self):
         logger.info("Initializing StyleTranslator")
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
         
-    async def get_styled_summary(self, url, style):
-        logger.info(f"Starting style translation for URL: {url} with style: {style}")
+    async def get_styled_summary(self, url, style, on_token=None, keep_session=False):
+        """
+        Summarize the article both plainly and in the given style, in a single request unless
+        the styled summary is streamed or its session kept.
+        If on_token is given the styled summary is streamed to it as it is generated.
+        With keep_session the result has a session_id, which can be passed to continue_styling
+        to refine the styled summary.
+        """
         try:
-            # Download and parse article
-            logger.info("Downloading and parsing article")
-            article = Article(url)
-            article.download()
-            article.parse()
-            logger.info(f"Successfully parsed article: {article.title}")
-            
-            # First get a basic summary
-            logger.info("Generating basic summary")
-            summary_response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"Summarize this news article in 3 sentences:\n{article.text}"
-                    }
-                ]
-            )
-            summary = summary_response.choices[0].message.content
-            logger.debug(f"Generated summary: {summary}")
-            
-            # Then translate the summary into the desired style
-            logger.info(f"Translating summary to {style} style")
-            style_response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"Rewrite this news summary in {style} style:\n{summary}"
-                    }
-                ]
+            result = await news_pipeline.analyze(
+                url, style=style, include_styled_summary=True,
+                summary_instruction=news_pipeline.THREE_SENTENCE_SUMMARY, on_token=on_token,
+                keep_session=keep_session
             )
-            
-            styled_summary = style_response.choices[0].message.content
-            logger.debug(f"Generated styled summary: {styled_summary}")
-            
-            result = {
-                "original_summary": summary,
-                "styled_summary": styled_summary
+            summaries = {
+                "original_summary": result["summary"],
+                "styled_summary": result["styled_summary"]
             }
-            logger.info("Successfully completed style translation")
-            return result
-            
+            if keep_session:
+                summaries["session_id"] = result["session_id"]
+            return summaries
         except Exception as e:
             logger.error(f"Error processing article: {str(e)}", exc_info=True)
             return f"Error processing article: {e}"
 
+    async def continue_styling(self, session_id, instruction, on_token=None):
+        """
+        Refine the latest styled summary of a session following the instruction, e.g.
+        "make it shorter". If on_token is given the new version is streamed to it.
+        """
+        try:
+            return await news_pipeline.continue_styling(session_id, instruction, on_token=on_token)
+        except Exception as e:
+            logger.error(f"Error refining styled summary: {str(e)}", exc_info=True)
+            return f"Error refining styled summary: {e}"
+
 async def main():
     logger.info("Starting main function")
     try:
@@ -82,14 +58,27 @@ async def main():
         logger.info(f"User input - URL: {url}, Style: {style}")
         
         translator = StyleTranslator()
-        result = await translator.get_styled_summary(url, style)
+        # Print the styled summary as it streams in rather than after it is complete
+        print("\nStyled Summary:")
+        result = await translator.get_styled_summary(
+            url, style, on_token=lambda token: print(token, end="", flush=True), keep_session=True
+        )
+        print()
         
         if isinstance(result, dict):
             logger.info("Successfully processed article")
             print("\nOriginal Summary:")
             print(result["original_summary"])
-            print("\nStyled Summary:")
-            print(result["styled_summary"])
+            
+            # Each refinement builds on the conversation so far
+            while instruction := input("\nRefine the styled summary (leave empty to finish): ").strip():
+                print("\nRefined Summary:")
+                refined = await translator.continue_styling(
+                    result["session_id"], instruction, on_token=lambda token: print(token, end="", flush=True)
+                )
+                print()
+                if refined.startswith("Error refining styled summary"):
+                    print(refined)
         else:
             logger.error(f"Failed to process article: {result}")
             print(result)
@@ -98,4 +87,4 @@ async def main():
         print(f"An error occurred: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from llm_cache import get_response_cache
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger('ArticleFetcher')
+
+# Upper bound on articles parsed in parallel
+PARSE_WORKERS = min(8, os.cpu_count() or 1)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0 Safari/537.36"
+)
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_http: Optional["httpx.AsyncClient"] = None
+
+
+@dataclass(frozen=True, slots=True)
+class ArticleContent:
+    """The parts of a parsed article the pipeline uses, small and picklable"""
+    url: str
+    title: str
+    text: str
+    authors: Tuple[str, ...] = ()
+    # ISO 8601, since datetimes don't round-trip through the JSON cache
+    publish_date: Optional[str] = None
+    top_image: str = ""
+    images: Tuple[str, ...] = ()
+
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    global _parse_pool
+    if _parse_pool is None:
+        # Forking a process that already runs threads (embeddings, torch, the SQLite cache lock)
+        # can deadlock the child, so workers start from a clean forkserver, or spawn on Windows
+        start_method = "spawn" if sys.platform == "win32" else "forkserver"
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context(start_method)
+        )
+    return _parse_pool
+
+
+def shutdown_parse_pool():
+    """Stop the parse workers, if any were started"""
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(cancel_futures=True)
+        _parse_pool = None
+
+
+def _get_http() -> "httpx.AsyncClient":
+    """Shared HTTP/2 client for article downloads, so repeat hosts reuse their connection"""
+    global _http
+    if _http is None:
+        import httpx
+        _http = httpx.AsyncClient(
+            http2=True,
+            timeout=10,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT}
+        )
+    return _http
+
+
+def _parse_html(url: str, html: str) -> ArticleContent:
+    """
+    Extract the article and its metadata from a downloaded page, run in a worker process.
+    trafilatura pulls in lxml, so it is only imported once an article is parsed.
+    """
+    import trafilatura
+    from trafilatura.utils import load_html
+    # Parse the page once, and collect image URLs before extraction prunes the tree.
+    # trafilatura reports only the lead image, so the rest come from the page itself.
+    tree = load_html(html)
+    if tree is None:
+        return ArticleContent(url, "", "")
+    images = tuple(dict.fromkeys(urljoin(url, src.strip()) for src in tree.xpath("//img/@src") if src.strip()))
+    extracted = trafilatura.bare_extraction(
+        tree, url=url, include_comments=False, favor_precision=True, with_metadata=True
+    )
+    # trafilatura 2 returns a Document, earlier versions a dict
+    if extracted is not None and not isinstance(extracted, dict):
+        extracted = extracted.as_dict()
+    extracted = extracted or {}
+    authors = extracted.get("author") or ""
+    return ArticleContent(
+        url,
+        extracted.get("title") or "",
+        extracted.get("text") or "",
+        authors=tuple(author.strip() for author in authors.split(";") if author.strip()),
+        publish_date=extracted.get("date"),
+        top_image=extracted.get("image") or "",
+        images=images
+    )
+
+
+async def fetch_article(url: str) -> ArticleContent:
+    """
+    Download and parse a news article. The download is async so the event loop stays free,
+    and extraction is lxml CPU work that holds the GIL, so it runs in a process pool to
+    let several articles parse in parallel. The parsed article is cached per URL so
+    re-running an analysis skips both steps.
+    """
+    cache = get_response_cache()
+    key = f"article:{url}"
+    cached = cache.get_json(key)
+    if cached is not None:
+        logger.info(f"Article cache hit for {url}")
+        return ArticleContent(
+            url,
+            cached["title"],
+            cached["text"],
+            authors=tuple(cached.get("authors", ())),
+            publish_date=cached.get("publish_date"),
+            top_image=cached.get("top_image", ""),
+            images=tuple(cached.get("images", ()))
+        )
+
+    response = await _get_http().get(url)
+    response.raise_for_status()
+    loop = asyncio.get_running_loop()
+    article = await loop.run_in_executor(_get_parse_pool(), _parse_html, url, response.text)
+    cache.set_json(key, {
+        "title": article.title,
+        "text": article.text,
+        "authors": article.authors,
+        "publish_date": article.publish_date,
+        "top_image": article.top_image,
+        "images": article.images
+    })
+    return article
+
+
+def _parse_feed_links(xml: bytes) -> List[str]:
+    """Article links of an RSS or Atom feed, in feed order"""
+    from xml.etree import ElementTree
+    root = ElementTree.fromstring(xml)
+    links = []
+    # RSS items carry the link as text, Atom entries as the href of a link element
+    for item in root.iter("item"):
+        link = item.findtext("link")
+        if link and link.strip():
+            links.append(link.strip())
+    atom = "{http://www.w3.org/2005/Atom}"
+    for entry in root.iter(f"{atom}entry"):
+        for link in entry.iter(f"{atom}link"):
+            if link.get("rel", "alternate") == "alternate" and link.get("href"):
+                links.append(link.get("href"))
+                break
+    return list(dict.fromkeys(links))
+
+
+async def fetch_feed_links(feed_url: str) -> List[str]:
+    """Download an RSS or Atom feed and return the article links it lists"""
+    response = await _get_http().get(feed_url)
+    response.raise_for_status()
+    return _parse_feed_links(response.content)
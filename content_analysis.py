@@ -1,11 +1,11 @@
 from transformers import AutoTokenizer, AutoModelForCausalLM
 import torch
 from torch.nn.functional import softmax
-from dotenv import load_dotenv
+from utils import load_env
 import os
 
 # Load environment variables from .env file
-load_dotenv()
+load_env()
 
 # Get the Hugging Face access token from the environment
 HF_ACCESS_TOKEN = os.getenv("HF_ACCESS_TOKEN")
@@ -1,23 +1,20 @@
-import os
 from logger import logging
-from dotenv import load_dotenv
 from utils import timing
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-from openai import OpenAI
+from llm_client import MODEL, chat_completion, get_client
 
 class ImageSummary():
 
-    @timing
     def __init__(self):
-        self.client = OpenAI(
-            api_key=OPENAI_API_KEY)
+        # Shares the process-wide OpenAI client and its connection pool
+        self.client = get_client()
 
     @timing
     async def __call__(self, url):
         try:
-            summary = self.client.chat.completions.create(
-                model="gpt-4o",
+            summary = await chat_completion(
+                self.client,
+                # A one sentence description doesn't need the full size model
+                model=MODEL,
                 messages=[
                     {
                         "role": "user",
@@ -35,7 +32,7 @@ class ImageSummary():
                         ],
                     }
                 ],
-                max_tokens=256,
+                max_tokens=60,
             )
             logging.info(f"Summary of the image: {summary.choices[0].message.content}")
             return summary.choices[0].message.content
@@ -57,11 +54,11 @@ if __name__ == "__main__":
             "https://ichef.bbci.co.uk/ace/standard/385/cpsprodpb/8090/live/cb3f89c0-ae6a-11ef-bdf5-b7cb2fa86e10.jpg",
             "https://sb.scorecardresearch.com/p?c1=2&c2=17986528&cs_ucfr=0&cv=2.0&cj=1",
             ]
-    import asyncio
+    from utils import run
     image_summary = ImageSummary()
     from speak import speak
     for i, url in enumerate(urls):
 
-        summary = image_summary(url)
-        asyncio.run(speak(f"Image {str(i+1)}"))
-        asyncio.run(speak(summary))
+        summary = run(image_summary(url))
+        run(speak(f"Image {str(i+1)}"))
+        run(speak(summary))
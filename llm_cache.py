@@ -0,0 +1,114 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+import orjson
+
+from llm_client import chat_completion
+from utils import CACHE_DIR
+
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletion
+
+logger = logging.getLogger('LLMCache')
+
+LLM_CACHE_PATH = os.path.join(CACHE_DIR, "llm_cache.sqlite")
+# How long a cached response stays valid, in seconds
+LLM_CACHE_TTL = int(os.getenv('SOA_LLM_CACHE_TTL', 24 * 60 * 60))
+# Expired entries are deleted at most this often, in seconds, so their space is reused
+# instead of the file growing with every response and audio clip ever stored
+LLM_CACHE_SWEEP_INTERVAL = 5 * 60
+
+
+class ResponseCache:
+    """Persistent key-value cache with per-entry expiry, for deterministic API responses"""
+
+    def __init__(self, path: str = LLM_CACHE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Articles are fetched in worker threads, so the connection is shared across threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float = LLM_CACHE_TTL):
+        now = time.time()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._next_sweep = now + LLM_CACHE_SWEEP_INTERVAL
+                deleted = self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+                if deleted:
+                    logger.debug("Deleted %d expired cache entries", deleted)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + ttl)
+            )
+            self._conn.commit()
+
+    def get_json(self, key: str):
+        value = self.get(key)
+        return orjson.loads(value) if value is not None else None
+
+    def set_json(self, key: str, value, ttl: float = LLM_CACHE_TTL):
+        self.set(key, orjson.dumps(value), ttl)
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide ResponseCache, opened on first use"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+
+def request_key(request: dict) -> str:
+    """Stable hash of a chat completion request"""
+    return hashlib.sha256(orjson.dumps(request, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+async def cached_chat(client, **request) -> "ChatCompletion":
+    """
+    chat_completion with a disk cache for requests with temperature 0 or unset; none
+    of our callers rely on getting a different sample for the same prompt. Identical
+    requests within LLM_CACHE_TTL return the stored response without hitting the API.
+    Only complete responses are stored, so one cut off at max_tokens can be retried.
+    """
+    if request.get("temperature", 0) != 0:
+        return await chat_completion(client, **request)
+
+    cache = get_response_cache()
+    key = f"chat:{request_key(request)}"
+    cached = cache.get_json(key)
+    if cached is not None:
+        from openai.types.chat import ChatCompletion
+        logger.info(f"LLM cache hit for {request.get('model')}")
+        return ChatCompletion.model_validate(cached)
+
+    response = await chat_completion(client, **request)
+    if response.choices and response.choices[0].finish_reason == "stop":
+        cache.set_json(key, response.model_dump(mode="json"))
+    else:
+        logger.debug("Not caching incomplete response for %s", request.get("model"))
+    return response
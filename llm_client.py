@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import os
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Optional
+
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from utils import load_env
+
+if TYPE_CHECKING:
+    import openai
+
+logger = logging.getLogger('LLMClient')
+
+load_env()
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+# Chat model used by every pipeline step
+MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# Fixed sampling seed so repeated requests give (best effort) reproducible, cacheable output
+SEED = int(os.getenv("OPENAI_SEED", "42"))
+# Article text beyond this many tokens is cut before prompting. Every prompt over an article
+# asks for a summary, and a news story's lead carries what a few sentences can say, so the
+# rest would only add input tokens and latency
+MAX_ARTICLE_TOKENS = int(os.getenv("MAX_ARTICLE_TOKENS", "2000"))
+# Upper bound on chat completions in flight across the whole process
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+
+_SEM = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+_client: Optional["openai.AsyncOpenAI"] = None
+_backoff = wait_random_exponential(min=1, max=30)
+
+
+def get_client() -> "openai.AsyncOpenAI":
+    """Process-wide AsyncOpenAI client, so every caller shares one keep-alive connection pool"""
+    global _client
+    if _client is None:
+        # openai and httpx are imported on first use to keep CLI startup fast
+        import httpx
+        import openai
+        _client = openai.AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                timeout=60
+            )
+        )
+    return _client
+
+
+@lru_cache(maxsize=None)
+def _encoding():
+    import tiktoken
+    try:
+        return tiktoken.encoding_for_model(MODEL)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def truncate_tokens(text: str, max_tokens: int = MAX_ARTICLE_TOKENS) -> str:
+    """Cut text to at most max_tokens tokens of MODEL's tokenizer"""
+    # Tokens are never shorter than one character, so short texts skip tokenizing
+    if len(text) <= max_tokens:
+        return text
+    tokens = _encoding().encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    logger.info(f"Truncating text from {len(tokens)} to {max_tokens} tokens")
+    return _encoding().decode(tokens[:max_tokens])
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the API asked us to wait before retrying, if it said so"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        if "retry-after-ms" in response.headers:
+            return float(response.headers["retry-after-ms"]) / 1000
+        if "retry-after" in response.headers:
+            return float(response.headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def _is_rate_limit(error: BaseException) -> bool:
+    from openai import RateLimitError
+    return isinstance(error, RateLimitError)
+
+
+def _wait(retry_state) -> float:
+    """Honor Retry-After when present, otherwise back off exponentially with jitter"""
+    delay = _retry_after(retry_state.outcome.exception())
+    if delay is None:
+        delay = _backoff(retry_state)
+    logger.warning(f"Rate limited, retrying in {delay:.1f}s (attempt {retry_state.attempt_number})")
+    return delay
+
+
+_retry_rate_limits = retry(
+    retry=retry_if_exception(_is_rate_limit),
+    wait=_wait,
+    stop=stop_after_attempt(6),
+    reraise=True
+)
+
+
+@_retry_rate_limits
+async def chat_completion(client: "openai.AsyncOpenAI", **request):
+    """
+    Run client.chat.completions.create(**request) with at most OPENAI_MAX_CONCURRENCY
+    calls in flight, retrying rate limited calls. The semaphore is released while
+    backing off so waiting retries don't hold a slot.
+    """
+    async with _SEM:
+        return await client.chat.completions.create(**request)
+
+
+@_retry_rate_limits
+async def stream_chat(client: "openai.AsyncOpenAI", on_token: Optional[Callable[[str], None]] = None,
+                      **request) -> str:
+    """
+    Stream a chat completion under the same concurrency limit and rate limit retries as
+    chat_completion, passing each content delta to on_token as it arrives. Returns the
+    full message content.
+    """
+    async with _SEM:
+        stream = await client.chat.completions.create(**request, stream=True)
+        buf = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                token = chunk.choices[0].delta.content
+                buf.append(token)
+                if on_token:
+                    on_token(token)
+    return "".join(buf)
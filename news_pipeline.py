@@ -0,0 +1,604 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Literal, Optional, Tuple, Union
+
+import orjson
+
+from article_fetcher import ArticleContent, fetch_article
+from llm_cache import cached_chat
+from llm_client import MODEL, SEED, get_client, stream_chat, truncate_tokens
+from utils import load_env
+
+logger = logging.getLogger('NewsPipeline')
+
+load_env()
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+if not OPENAI_API_KEY:
+    logger.error("OpenAI API key not found in environment variables")
+    raise ValueError("OpenAI API key not found")
+
+# Perspectives per request when a batched comments response comes back truncated or malformed
+COMMENT_CHUNK_SIZE = 2
+# Styling conversations kept for follow-up refinements, least recently used dropped first
+STYLING_SESSION_LIMIT = 256
+
+# Summary instructions used by the different entry points
+BRIEF_SUMMARY = "Summarize this news article briefly"
+SPEECH_SUMMARY = "Summarize this news article briefly keep the length less than 30 seconds of speech"
+THREE_SENTENCE_SUMMARY = "Summarize this news article in 3 sentences"
+
+# Static instructions go in the system message and the per-call content last, so repeated
+# requests share an identical prompt prefix that OpenAI's prompt caching can reuse. The style
+# comes after the article so restyling the same article still reuses the article prefix, and
+# each prompt's requests carry a prompt_cache_key to route them to the same cache.
+# OpenAI only caches prefixes of 1024 tokens or more. The styled prompts lead with the style
+# guide below, which puts each of them well over that, so they are cached across every article.
+_STYLE_RUBRIC = """Style guide: everything you write here is read aloud by a news app, in a requested style.
+The facts always come from the material you are given; the style only changes how they are told.
+
+General rules for every style:
+- Keep every name, number, date and place exactly as reported. Never invent quotes, events or
+  reactions to make a style land better.
+- The text is turned into speech, so write complete spoken sentences. Do not use headings,
+  bullet points, emoji, hashtags, URLs, stage directions or text in brackets.
+- Spell out symbols a speaker would say as words, such as "percent" for % and "dollars" for $.
+  Write numbers the way they are read aloud when the digits would be awkward to speak.
+- Avoid sound effects written as text (no "*beat drops*" or "ahem"), since the voice reads them literally.
+- Keep the tone respectful when the story involves death, violence, illness or disaster. Tone the
+  style down rather than joke about victims, and never mock real people for who they are.
+- Follow any length instruction you are given. A style never makes the text longer than asked.
+- If the requested style matches one described below, follow its guide. For any other style,
+  infer its vocabulary, rhythm and attitude the same way, keeping to the general rules.
+
+Every example below restyles this sentence: "The city council approved a new budget on Tuesday
+that raises spending on public transport by 12 percent."
+
+RAP
+- Write in rhyming lines with a steady four-beat rhythm, favouring end rhymes and some internal rhyme.
+- Confident, energetic voice with contemporary slang that stays clean and easy to follow.
+- Keep lines short enough to be spoken in one breath, and let the key fact land on a rhyme.
+- No explicit language, and no name-dropping of real artists.
+Example: "Tuesday in the chamber, the council made the call, / twelve percent more for the buses,
+transit standing tall. / The budget got approved, yeah the vote went through, / more trains on
+the tracks for me and for you."
+
+Uwu (baby talk)
+- Soft, cutesy and affectionate. Swap many r and l sounds for w ("weally", "wittle"), while
+  keeping names, numbers and key nouns easy to recognise.
+- Use gentle exclamations such as "oh my" and "yay" sparingly, at most one or two per paragraph.
+- Short, simple sentences with a warm, excited tone. Never use this style to mock people in
+  serious or tragic stories; soften it further instead.
+Example: "Oh my, the city council said yes to a bwand new budget on Tuesday! It gives twelve
+percent more money to buses and twains, so evewyone can get awound easier. Yay!"
+
+12 year old
+- Write like a bright twelve year old telling friends about the news: casual, curious and a bit dramatic.
+- Use everyday words and short sentences. Explain anything complicated in simple terms, as if
+  the listener has never heard of it.
+- Light modern slang is fine ("honestly", "kind of a big deal"), but keep it natural and readable.
+- It can include a quick opinion or a question, but the facts stay accurate.
+Example: "Okay so the city council just approved this new budget on Tuesday, and they're putting
+twelve percent more money into buses and trains. Which is honestly kind of a big deal if you
+take the bus to school like I do."
+
+1940 News Reader
+- Write as a radio newsreader of the 1940s: formal, brisk and authoritative, with a confident
+  newsreel cadence.
+- Use period phrasing such as "Good evening", "word comes today", "this reporter" and
+  "ladies and gentlemen", without overdoing it.
+- Clear declarative sentences, with the most important fact first. Avoid modern slang and modern
+  references unless they are part of the story; name them plainly when they are.
+Example: "Good evening, ladies and gentlemen. Word comes from City Hall this Tuesday that the
+council has approved a new budget, raising the city's spending on public transport by a full
+twelve percent. A boon, this reporter is told, for the working commuter."
+
+Shakespearean
+- Write in Early Modern English in the manner of Shakespeare's plays: thee, thou, thy, doth,
+  hath, 'tis, and inverted word order where it sounds natural.
+- Aim for a loose iambic rhythm and a touch of dramatic flourish, with the occasional metaphor or
+  apostrophe, without sacrificing clarity.
+- Modern terms such as "budget" or "public transport" stay as they are, so the facts remain clear.
+- Keep it speakable: avoid archaic words so obscure that a listener would lose the meaning.
+Example: "Hark, upon this Tuesday did the council of the city grant its new budget, and lo,
+twelve parts in a hundred more shall flow unto the carriages of the common folk, that all may
+travel thus more easily."
+
+Comments from perspectives
+- When writing comments, each one is spoken by a different person holding its perspective. Keep
+  the requested style, but let the perspective decide what they focus on and how they feel about it.
+- Each comment should make a point of its own rather than repeat the summary or another comment."""
+
+
+_SUMMARY_PROMPT = """You summarize news articles. Follow the summary instruction you are given,
+keep to the facts reported in the article and write plain prose with no headings or lists.
+
+Return only the summary, no other text."""
+
+_STYLED_SUMMARY_PROMPT = _STYLE_RUBRIC + """
+
+You summarize news articles in a requested style. Follow the summary
+instruction you are given for the length, keep to the facts reported in the article and write the
+whole summary in the requested style. The output will be used for text to speech, so write it as
+natural spoken language with no headings or lists.
+
+Return only the styled summary, no other text."""
+
+_PERSPECTIVES_PROMPT = """Based on the news article summary you are given, determine the 4-5 most relevant perspectives or stakeholders
+who would have interesting and diverse viewpoints on this topic. Return the result as a JSON object with a
+"perspectives" array of strings, where each string is a specific type of commenter (e.g., "Tech Industry Expert", "Privacy Advocate", etc.).
+
+Consider factors like:
+- The main topic and field (tech, politics, sports, etc.)
+- Key stakeholders mentioned or affected
+- Relevant expert viewpoints needed
+- Potential opposing viewpoints
+- Local vs global perspectives if relevant
+
+Return only the JSON object, no other text."""
+
+_SUMMARIES_PROMPT = _STYLE_RUBRIC + """
+
+Given a news article, a summary instruction and a style, return a JSON object with these keys:
+- summary: a summary of the article that follows the summary instruction
+- styled_summary: the summary rewritten in the requested style
+
+Return only the JSON object, no other text."""
+
+_OVERVIEW_PROMPT = _STYLE_RUBRIC + """
+
+Given a news article, a summary instruction and a style, return a JSON object with these keys:
+- summary: a summary of the article that follows the summary instruction
+- styled_summary: the summary rewritten in the requested style
+- perspectives: an array of the 4-5 most relevant perspectives or stakeholders who would have
+  interesting and diverse viewpoints on this topic, where each string is a specific type of
+  commenter (e.g., "Tech Industry Expert", "Privacy Advocate", etc.)
+
+When choosing perspectives consider factors like:
+- The main topic and field (tech, politics, sports, etc.)
+- Key stakeholders mentioned or affected
+- Relevant expert viewpoints needed
+- Potential opposing viewpoints
+- Local vs global perspectives if relevant
+
+Return only the JSON object, no other text."""
+
+_COMMENT_GUIDANCE = {
+    "plain": """Write each comment in a style and tone typical of its perspective. Include specific insights
+relevant to that expertise or viewpoint. Be authentic to how this type of person would actually respond.""",
+    "styled": """Write every comment in the requested style while maintaining the authenticity of its perspective.
+For example, if the style is 'RAP' and the perspective is a tech expert, write like a world famous wrapper
+discussing technology. If the style is 'poetic' and the perspective is a political analyst, write a poetic
+analysis of the political situation.
+
+Make them creative and entertaining while still providing meaningful insights from each perspective. the output
+will be used for text to speech so make minor adjustments accordingly to make it sound like natural human speech."""
+}
+
+_COMMENT_PROMPTS = {
+    "plain": f"""For each perspective you are given, provide a brief, realistic comment on the news summary,
+written as someone holding that perspective.
+
+{_COMMENT_GUIDANCE["plain"]}
+
+Return a JSON object mapping each perspective string, exactly as given, to its comment string.""",
+    "styled": f"""{_STYLE_RUBRIC}
+
+For each perspective you are given, provide a comment on the news summary in the
+requested style, written as someone holding that perspective.
+
+{_COMMENT_GUIDANCE["styled"]}
+
+Return a JSON object mapping each perspective string, exactly as given, to its comment string."""
+}
+
+CommentMode = Literal["plain", "styled"]
+
+
+@dataclass(slots=True)
+class _StylingSession:
+    """
+    Message history of a styling conversation. Turns are only ever appended, so every
+    follow-up request starts with the previous request as an identical, cacheable prefix.
+    The lock keeps concurrent refinements from building on the same stale history.
+    """
+    messages: List[dict]
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+_styling_sessions: "OrderedDict[str, _StylingSession]" = OrderedDict()
+
+
+def _analysis_prompt(mode: CommentMode, with_styled_summary: bool) -> str:
+    inputs = "a news article, a summary instruction and a style" if mode == "styled" or with_styled_summary \
+        else "a news article and a summary instruction"
+    styled_summary_key = "- styled_summary: the summary rewritten in the requested style\n" if with_styled_summary else ""
+    comment = "comment in the requested style" if mode == "styled" else "brief, realistic comment"
+    style_guide = f"{_STYLE_RUBRIC}\n\n" if mode == "styled" or with_styled_summary else ""
+    return f"""{style_guide}Given {inputs}, return a JSON object with these keys:
+- summary: a summary of the article that follows the summary instruction
+{styled_summary_key}- perspectives: an array of the 4-5 most relevant perspectives or stakeholders who would have
+  interesting and diverse viewpoints on this topic, where each string is a specific type of
+  commenter (e.g., "Tech Industry Expert", "Privacy Advocate", etc.)
+- comments: an object mapping each perspective string, exactly as in perspectives, to a
+  {comment} on the summary written as someone holding that perspective
+
+When choosing perspectives consider factors like:
+- The main topic and field (tech, politics, sports, etc.)
+- Key stakeholders mentioned or affected
+- Relevant expert viewpoints needed
+- Potential opposing viewpoints
+- Local vs global perspectives if relevant
+
+{_COMMENT_GUIDANCE[mode]}
+
+Return only the JSON object, no other text."""
+
+
+# Built once, so each variant is a fixed prompt prefix like the others
+_ANALYSIS_PROMPTS = {
+    (mode, with_styled_summary): _analysis_prompt(mode, with_styled_summary)
+    for mode in ("plain", "styled") for with_styled_summary in (False, True)
+}
+
+
+async def get_relevant_perspectives(summary: str) -> List[str]:
+    """Determine the most relevant perspectives for commenting on an article from its summary."""
+    logger.info("Getting relevant perspectives for article")
+    try:
+        perspective_response = await cached_chat(
+            get_client(),
+            model=MODEL,
+            temperature=0,
+            seed=SEED,
+            max_tokens=200,
+            messages=[
+                {"role": "system", "content": _PERSPECTIVES_PROMPT},
+                {"role": "user", "content": f"Article summary: {summary}"}
+            ],
+            response_format={"type": "json_object"},
+            extra_body={"prompt_cache_key": "news_pipeline.perspectives"}
+        )
+
+        perspectives = orjson.loads(perspective_response.choices[0].message.content)["perspectives"]
+        logger.info(f"Generated {len(perspectives)} perspectives: {perspectives}")
+        return perspectives
+    except orjson.JSONDecodeError as e:
+        logger.error(f"Failed to parse perspectives JSON: {e}")
+        logger.debug("Raw response: %s", perspective_response.choices[0].message.content)
+        raise
+    except Exception as e:
+        logger.error(f"Error getting perspectives: {e}")
+        raise
+
+
+async def _gen_summary(article_text: str, instruction: str) -> str:
+    logger.info("Generating basic summary")
+    summary_response = await cached_chat(
+        get_client(),
+        model=MODEL,
+        temperature=0,
+        seed=SEED,
+        # 30 seconds of speech or 3 sentences is about 80 words, and a tight cap
+        # stops a rambling completion early
+        max_tokens=180,
+        messages=[
+            {"role": "system", "content": _SUMMARY_PROMPT},
+            {"role": "user", "content": f"Summary instruction: {instruction}\n\nArticle text: {article_text}"}
+        ],
+        extra_body={"prompt_cache_key": "news_pipeline.summary"}
+    )
+    summary = summary_response.choices[0].message.content
+    logger.debug("Generated summary: %.1000s...", summary)
+    return summary
+
+
+async def _gen_styled_summary(article_text: str, style: str, instruction: str,
+                              on_token: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Summarize the article in the given style, streaming it to on_token if given. This works
+    from the article itself rather than the plain summary so both can be generated at once.
+    """
+    logger.info(f"Generating {style} style summary")
+    styled_summary = await _styling_turn(_styled_summary_messages(article_text, style, instruction), 180, on_token)
+    logger.debug("Generated styled summary: %s", styled_summary)
+    return styled_summary
+
+
+def _styled_summary_messages(article_text: str, style: str, instruction: str) -> List[dict]:
+    return [
+        {"role": "system", "content": _STYLED_SUMMARY_PROMPT},
+        {"role": "user", "content": f"Summary instruction: {instruction}\n\nArticle text: {article_text}\n\nStyle: {style}"}
+    ]
+
+
+async def _styling_turn(messages: List[dict], max_tokens: int,
+                        on_token: Optional[Callable[[str], None]] = None) -> str:
+    """Run one styling request, streamed to on_token if given"""
+    # Temperature is left at the API default for livelier wording, but cached_chat still
+    # caches the response, so the same article and style read the same within LLM_CACHE_TTL
+    style_request = dict(
+        model=MODEL,
+        seed=SEED,
+        max_tokens=max_tokens,
+        messages=messages,
+        extra_body={"prompt_cache_key": "news_pipeline.styled_summary"}
+    )
+    if on_token:
+        return await stream_chat(get_client(), on_token=on_token, **style_request)
+    style_response = await cached_chat(get_client(), **style_request)
+    return style_response.choices[0].message.content
+
+
+def _start_styling_session(article_text: str, style: str, instruction: str, styled_summary: str) -> str:
+    """
+    Keep the styling conversation so far for follow-up refinements, returning its id. The
+    styled summary must have come from the _styled_summary_messages request, so the history
+    holds exactly what was sent.
+    """
+    session_id = uuid.uuid4().hex
+    _styling_sessions[session_id] = _StylingSession([
+        *_styled_summary_messages(article_text, style, instruction),
+        {"role": "assistant", "content": styled_summary}
+    ])
+    if len(_styling_sessions) > STYLING_SESSION_LIMIT:
+        _styling_sessions.popitem(last=False)
+    return session_id
+
+
+async def continue_styling(session_id: str, instruction: str,
+                           on_token: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Refine the latest styled summary of a styling session following the instruction, streaming
+    the new version to on_token if given. The new turn is appended to the session's history.
+    """
+    session = _styling_sessions.get(session_id)
+    if session is None:
+        raise KeyError(f"Unknown or expired styling session: {session_id}")
+    _styling_sessions.move_to_end(session_id)
+    logger.info(f"Continuing styling session {session_id}: {instruction}")
+    turn = {"role": "user", "content": instruction}
+    async with session.lock:
+        # Room for refinements that ask for more than the original summary's length
+        styled_summary = await _styling_turn([*session.messages, turn], 400, on_token)
+        session.messages += [turn, {"role": "assistant", "content": styled_summary}]
+    logger.debug("Refined styled summary: %s", styled_summary)
+    return styled_summary
+
+
+async def _gen_overview(article_text: str, style: str, instruction: str, with_perspectives: bool) -> dict:
+    """
+    Summarize the article and restyle the summary in a single request, also picking
+    perspectives when with_perspectives is set
+    """
+    logger.info("Generating summary and styled summary%s for the article",
+                " and perspectives" if with_perspectives else "")
+    overview_response = await cached_chat(
+        get_client(),
+        model=MODEL,
+        temperature=0,
+        seed=SEED,
+        # Two capped summaries, plus the perspectives, in JSON
+        max_tokens=500 if with_perspectives else 400,
+        messages=[
+            {"role": "system", "content": _OVERVIEW_PROMPT if with_perspectives else _SUMMARIES_PROMPT},
+            {"role": "user", "content": f"Summary instruction: {instruction}\n\nArticle text: {article_text}\n\nStyle: {style}"}
+        ],
+        response_format={"type": "json_object"},
+        extra_body={"prompt_cache_key": "news_pipeline.overview" if with_perspectives else "news_pipeline.summaries"}
+    )
+    content = overview_response.choices[0].message.content
+    try:
+        overview = orjson.loads(content)
+        if not all(isinstance(overview.get(key), str) for key in ("summary", "styled_summary")):
+            raise ValueError("summary or styled_summary missing")
+        if with_perspectives and not isinstance(overview.get("perspectives"), list):
+            raise ValueError("perspectives missing")
+    except (ValueError, AttributeError) as e:
+        logger.error(f"Failed to parse overview JSON: {e}")
+        logger.debug("Raw response: %s", content)
+        raise
+    if with_perspectives:
+        # Only string perspectives can key the comments
+        overview["perspectives"] = [p for p in overview["perspectives"] if isinstance(p, str)]
+        logger.info(f"Generated {len(overview['perspectives'])} perspectives: {overview['perspectives']}")
+    logger.debug("Generated summary: %.1000s...", overview["summary"])
+    return overview
+
+
+async def _gen_comments_batch(perspectives: List[str], summary: str, mode: CommentMode,
+                              style: Optional[str]) -> Dict[str, str]:
+    """Generate comments for several perspectives in a single request"""
+    logger.info(f"Generating comments for perspectives: {perspectives}")
+    user_content = f"Article Summary: {summary}\n\n"
+    if mode == "styled":
+        user_content += f"Style: {style}\n\n"
+    user_content += f"Perspectives: {json.dumps(perspectives)}"
+    # Temperature unset as for the styled summary, so these comments are cached too
+    comments_response = await cached_chat(
+        get_client(),
+        model=MODEL,
+        seed=SEED,
+        max_tokens=400 * len(perspectives),
+        messages=[
+            {"role": "system", "content": _COMMENT_PROMPTS[mode]},
+            {"role": "user", "content": user_content}
+        ],
+        response_format={"type": "json_object"},
+        extra_body={"prompt_cache_key": f"news_pipeline.comments.{mode}"}
+    )
+    try:
+        comments = orjson.loads(comments_response.choices[0].message.content)
+    except orjson.JSONDecodeError as e:
+        logger.warning(f"Failed to parse comments JSON: {e}")
+        return {}
+    if not isinstance(comments, dict):
+        return {}
+    return {p: comment for p, comment in comments.items() if p in perspectives and isinstance(comment, str)}
+
+
+async def _gen_comments(perspectives: List[str], summary: str, mode: CommentMode,
+                        style: Optional[str]) -> Dict[str, str]:
+    """Generate comments for all perspectives in one request, retrying any it misses in small chunks"""
+    comments = await _gen_comments_batch(perspectives, summary, mode, style)
+    missing = [perspective for perspective in perspectives if perspective not in comments]
+    if missing:
+        logger.warning(f"Batched comments missed {len(missing)} perspectives, retrying in chunks of {COMMENT_CHUNK_SIZE}")
+        chunks = [missing[i:i + COMMENT_CHUNK_SIZE] for i in range(0, len(missing), COMMENT_CHUNK_SIZE)]
+        for chunk_comments in await asyncio.gather(
+            *(_gen_comments_batch(chunk, summary, mode, style) for chunk in chunks)
+        ):
+            comments.update(chunk_comments)
+    for perspective in perspectives:
+        if perspective in comments:
+            logger.debug("Generated comment for %s: %.100s...", perspective, comments[perspective])
+        else:
+            logger.error(f"No comment generated for perspective: {perspective}")
+    return {perspective: comments[perspective] for perspective in perspectives if perspective in comments}
+
+
+async def _gen_analysis(article_text: str, style: Optional[str], instruction: str, mode: CommentMode,
+                        with_styled_summary: bool) -> dict:
+    """
+    Summarize the article, optionally restyle the summary, pick perspectives and comment on
+    the summary from each of them, all in a single request. Comments the response misses are
+    generated separately.
+    """
+    logger.info("Generating summary%s, perspectives and %s comments for the article",
+                ", styled summary" if with_styled_summary else "", mode)
+    user_content = f"Summary instruction: {instruction}\n\nArticle text: {article_text}"
+    if mode == "styled" or with_styled_summary:
+        user_content += f"\n\nStyle: {style}"
+    analysis_response = await cached_chat(
+        get_client(),
+        model=MODEL,
+        seed=SEED,
+        # Room for the summaries, perspectives and up to five comments
+        max_tokens=3000,
+        messages=[
+            {"role": "system", "content": _ANALYSIS_PROMPTS[(mode, with_styled_summary)]},
+            {"role": "user", "content": user_content}
+        ],
+        response_format={"type": "json_object"},
+        extra_body={"prompt_cache_key": f"news_pipeline.analysis.{mode}"}
+    )
+    content = analysis_response.choices[0].message.content
+    try:
+        analysis = orjson.loads(content)
+        keys = ("summary", "styled_summary") if with_styled_summary else ("summary",)
+        if not all(isinstance(analysis.get(key), str) for key in keys):
+            raise ValueError("summary or styled_summary missing")
+        if not isinstance(analysis.get("perspectives"), list):
+            raise ValueError("perspectives missing")
+    except (ValueError, AttributeError) as e:
+        logger.error(f"Failed to parse analysis JSON: {e}")
+        logger.debug("Raw response: %s", content)
+        raise
+    # Only string perspectives can key the comments
+    perspectives = analysis["perspectives"] = [p for p in analysis["perspectives"] if isinstance(p, str)]
+    logger.info(f"Generated {len(perspectives)} perspectives: {perspectives}")
+    comments = analysis.get("comments")
+    comments = {p: c for p, c in comments.items() if isinstance(c, str)} if isinstance(comments, dict) else {}
+    missing = [perspective for perspective in perspectives if perspective not in comments]
+    if missing:
+        logger.warning(f"Analysis missed comments for {len(missing)} perspectives, generating them separately")
+        comments.update(await _gen_comments(missing, analysis["summary"], mode, style))
+    analysis["comments"] = {perspective: comments[perspective] for perspective in perspectives if perspective in comments}
+    return analysis
+
+
+async def _commentary_chain(summary: str, perspectives: Optional[List[str]], mode: CommentMode,
+                            style: Optional[str]) -> Tuple[List[str], Dict[str, str]]:
+    """Pick perspectives from the summary unless already known, then generate their comments"""
+    if perspectives is None:
+        perspectives = await get_relevant_perspectives(summary)
+    return perspectives, await _gen_comments(perspectives, summary, mode, style)
+
+
+async def _summary_chain(article_text: str, instruction: str, mode: Optional[CommentMode],
+                         style: Optional[str]) -> Tuple[str, Optional[Tuple[List[str], Dict[str, str]]]]:
+    """Summarize the article, then comment on the summary if a comment mode is set"""
+    summary = await _gen_summary(article_text, instruction)
+    commentary = await _commentary_chain(summary, None, mode, style) if mode else None
+    return summary, commentary
+
+
+async def _notify(coro, callback: Optional[Callable[[str], None]]):
+    """Await coro and pass its result to callback, if given, as soon as it is ready"""
+    result = await coro
+    if callback:
+        callback(result)
+    return result
+
+
+async def _no_result():
+    return None
+
+
+async def analyze(article: Union[str, ArticleContent], *, style: Optional[str] = None, comment_mode: Optional[CommentMode] = None,
+                  include_styled_summary: bool = False, summary_instruction: str = BRIEF_SUMMARY,
+                  on_token: Optional[Callable[[str], None]] = None,
+                  on_styled_summary: Optional[Callable[[str], None]] = None,
+                  keep_session: bool = False) -> dict:
+    """
+    Run the requested steps over an article, given as a URL or an already fetched
+    ArticleContent, each starting as soon as its inputs are ready. Returns a dict with the title and summary, plus styled_summary when
+    include_styled_summary is set and perspectives and comments when comment_mode is set.
+    style is required for the styled summary and for "styled" comments. on_token receives
+    the styled summary as it streams in, and on_styled_summary receives it once complete,
+    before the comments are done. keep_session keeps the styling conversation for
+    continue_styling and adds its session_id to the result.
+    """
+    if isinstance(article, str):
+        logger.info(f"Downloading and parsing article: {article}")
+        article = await fetch_article(article)
+    logger.info(f"Starting analysis for URL: {article.url} with style: {style}")
+    result = {"title": article.title}
+    article_text = truncate_tokens(article.text)
+    # A kept session records the styled summary request, so it has to be the one actually made
+    own_styled_request = bool(on_token) or keep_session
+
+    if comment_mode and not own_styled_request and not on_styled_summary:
+        # Nothing is waiting on the summaries before the comments, so everything comes from one request
+        analysis = await _gen_analysis(article_text, style, summary_instruction, comment_mode, include_styled_summary)
+        result["summary"] = analysis["summary"]
+        if include_styled_summary:
+            result["styled_summary"] = analysis["styled_summary"]
+        commentary = analysis["perspectives"], analysis["comments"]
+    elif include_styled_summary and not own_styled_request:
+        # Summary, styled summary and any perspectives all come from one pass over the article
+        overview = await _gen_overview(article_text, style, summary_instruction, comment_mode is not None)
+        summary = overview["summary"]
+        result.update(summary=summary, styled_summary=overview["styled_summary"])
+        if on_styled_summary:
+            on_styled_summary(overview["styled_summary"])
+        commentary = await _commentary_chain(
+            summary, overview.get("perspectives"), comment_mode, style
+        ) if comment_mode else None
+    else:
+        # A streamed or kept styled summary can't share a JSON response, but it doesn't wait on the
+        # plain summary either, and the comments only need the plain summary, so the two
+        # chains run side by side
+        styled_summary, (summary, commentary) = await asyncio.gather(
+            _notify(_gen_styled_summary(article_text, style, summary_instruction, on_token), on_styled_summary)
+            if include_styled_summary else _no_result(),
+            _summary_chain(article_text, summary_instruction, comment_mode, style)
+        )
+        result["summary"] = summary
+        if styled_summary is not None:
+            result["styled_summary"] = styled_summary
+    if commentary is not None:
+        result["perspectives"], result["comments"] = commentary
+    if keep_session and "styled_summary" in result:
+        result["session_id"] = _start_styling_session(
+            article_text, style, summary_instruction, result["styled_summary"]
+        )
+
+    logger.info("Successfully completed article analysis")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Final result: %s", orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
+    return result
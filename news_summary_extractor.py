@@ -1,11 +1,12 @@
 import json
-from newspaper import Article
 from dateutil import parser
 import re
 import asyncio
 from text_summary import TextSummary
 from image_summary import ImageSummary
 from logger import logging
+from article_fetcher import ArticleContent, fetch_article
+from llm_client import truncate_tokens
 
 class ArticleExtractor:
     def __init__(self):
@@ -18,24 +19,21 @@ class ArticleExtractor:
         self.text_summariser = TextSummary()
         self.image_summariser = ImageSummary()
 
-    async def __call__(self, article_url):
-        self.set_article(article_url)
-        self.download_and_parse()
+    async def __call__(self, article):
+        """
+        Summarize an article, given as a URL or an ArticleContent that was already fetched.
+        """
+        if isinstance(article, str):
+            article = await fetch_article(article)
+        self.set_article(article)
         await self.extract_details()
         return self.article_data["summary"]
 
-    def set_article(self, article_url):
-        self.url = article_url
-        self.article = Article(article_url)
+    def set_article(self, article: ArticleContent):
+        self.url = article.url
+        self.article = article
         self.article_data = {}
 
-    def download_and_parse(self):
-        """
-        Download and parse the article.
-        """
-        self.article.download()
-        self.article.parse()
-
     @staticmethod
     def parse_relative_time(time_string):
         """
@@ -51,7 +49,11 @@ class ArticleExtractor:
         Extract the published date or relative time.
         """
         if self.article.publish_date:
-            return self.article.publish_date
+            try:
+                return parser.isoparse(self.article.publish_date)
+            except ValueError:
+                # Extractors sometimes report dates that aren't ISO 8601; treat them as missing
+                logging.warning(f"Ignoring unparseable publish date: {self.article.publish_date}")
 
         # Search for relative time
         relative_time_match = re.search(r'updated\s*(.*)', self.article.text, re.IGNORECASE)
@@ -64,7 +66,7 @@ class ArticleExtractor:
         Extract authors or infer from text patterns.
         """
         if self.article.authors:
-            return self.article.authors
+            return list(self.article.authors)
 
         # Attempt to find potential author names
         author_matches = re.findall(r'By\s+([A-Za-z\s]+)', self.article.text)
@@ -83,7 +85,9 @@ class ArticleExtractor:
 
             # Generate summary
             image_summary = await self.image_summariser(self.article_data["main_image"])
-            text_summary = await self.text_summariser(f"Text: {self.article.text} \n Image description: {image_summary}")
+            text_summary = await self.text_summariser(
+                f"Text: {truncate_tokens(self.article.text)} \n Image description: {image_summary}"
+            )
             logging.info(f"Summary of the full article is: {text_summary}")
             return text_summary
             # shield_on = await check_offensive_content(text_summary)
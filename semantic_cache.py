@@ -0,0 +1,189 @@
+import asyncio
+import functools
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+
+from utils import CACHE_DIR
+
+logger = logging.getLogger('SemanticCache')
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SEMANTIC_CACHE_PATH = os.path.join(CACHE_DIR, "semantic_cache.sqlite")
+# all-MiniLM-L6-v2 reads at most 256 wordpieces and silently drops the rest, which is
+# roughly 180 words of news prose, so longer texts are embedded in chunks of this many words
+EMBED_CHUNK_WORDS = 180
+
+
+class SemanticCache:
+    """
+    Persistent cache of LLM responses looked up first by exact (normalized) text hash
+    and then by cosine similarity of locally computed sentence embeddings.
+    """
+
+    def __init__(self, path: str = SEMANTIC_CACHE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Audio is looked up and stored from worker threads, so the connection is shared across threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key_hash TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                response_json TEXT NOT NULL,
+                PRIMARY KEY (namespace, key_hash)
+            )"""
+        )
+        self._conn.commit()
+        self._model = None
+        # namespace -> (stacked unit-norm embeddings, key hashes in row order)
+        self._matrices: Dict[str, Tuple[np.ndarray, List[str]]] = {}
+
+    @staticmethod
+    def key_hash(text: str) -> str:
+        """Hash of the whitespace- and case-normalized text"""
+        normalized = " ".join(text.lower().split())
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    def _get_model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            logger.info(f"Loading embedding model {EMBEDDING_MODEL}")
+            self._model = SentenceTransformer(EMBEDDING_MODEL)
+        return self._model
+
+    def embed(self, text: str) -> np.ndarray:
+        """
+        Compute a unit-norm embedding of a short text, of which only the model's window counts;
+        CPU bound, so call it off the event loop
+        """
+        return self._get_model().encode(text, normalize_embeddings=True).astype(np.float32)
+
+    def embed_document(self, text: str) -> np.ndarray:
+        """
+        Compute a unit-norm embedding of the whole of a long text, as the normalized mean of
+        its EMBED_CHUNK_WORDS-word chunks; CPU bound, so call it off the event loop
+        """
+        words = text.split()
+        chunks = [" ".join(words[i:i + EMBED_CHUNK_WORDS]) for i in range(0, len(words), EMBED_CHUNK_WORDS)]
+        embeddings = self._get_model().encode(chunks or [text], normalize_embeddings=True)
+        mean = embeddings.mean(axis=0)
+        return (mean / np.linalg.norm(mean)).astype(np.float32)
+
+    def get_exact(self, namespace: str, text: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response_json FROM entries WHERE namespace = ? AND key_hash = ?",
+                (namespace, self.key_hash(text))
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_similar(self, namespace: str, embedding: np.ndarray, threshold: float) -> Optional[str]:
+        """Return the stored response of the most similar entry if it clears the threshold"""
+        with self._lock:
+            matrix, hashes = self._load_namespace(namespace)
+            if not hashes:
+                return None
+            similarities = matrix @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] < threshold:
+                return None
+            logger.info(f"Semantic cache hit in {namespace} (similarity {similarities[best]:.3f})")
+            row = self._conn.execute(
+                "SELECT response_json FROM entries WHERE namespace = ? AND key_hash = ?",
+                (namespace, hashes[best])
+            ).fetchone()
+        return row[0] if row else None
+
+    def store(self, namespace: str, text: str, embedding: np.ndarray, response_json: str):
+        key_hash = self.key_hash(text)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key_hash, embedding, response_json) VALUES (?, ?, ?, ?)",
+                (namespace, key_hash, embedding.tobytes(), response_json)
+            )
+            self._conn.commit()
+            matrix, hashes = self._load_namespace(namespace)
+            if key_hash not in hashes:
+                matrix = np.vstack([matrix, embedding]) if hashes else embedding[np.newaxis, :]
+                self._matrices[namespace] = (matrix, hashes + [key_hash])
+
+    def _load_namespace(self, namespace: str) -> Tuple[np.ndarray, List[str]]:
+        # Called with the lock held
+        if namespace not in self._matrices:
+            rows = self._conn.execute(
+                "SELECT key_hash, embedding FROM entries WHERE namespace = ?", (namespace,)
+            ).fetchall()
+            hashes = [key_hash for key_hash, _ in rows]
+            if rows:
+                matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows])
+            else:
+                matrix = np.empty((0, 0), dtype=np.float32)
+            self._matrices[namespace] = (matrix, hashes)
+        return self._matrices[namespace]
+
+
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Process-wide SemanticCache, opened on first use"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache()
+    return _semantic_cache
+
+
+def _encode_result(result) -> str:
+    # orjson serializes dataclasses natively
+    return orjson.dumps(result).decode()
+
+
+def _decode_result(response_json: str, result_type):
+    data = orjson.loads(response_json)
+    if result_type is None:
+        return data
+    if isinstance(data, list):
+        return [result_type(**item) for item in data]
+    return result_type(**data)
+
+
+def semantic_cached(threshold: float = 0.95, key=None, scope=None, result_type=None):
+    """
+    Cache an async method's result in the SemanticCache.
+
+    key(*args, **kwargs) gives the text to match on (defaults to the joined arguments),
+    scope(*args, **kwargs) gives a value that must match exactly (e.g. a style), and
+    result_type is the dataclass to rebuild cached results into.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            text = key(*args, **kwargs) if key else "\n".join(str(arg) for arg in args)
+            namespace = func.__qualname__
+            if scope:
+                namespace = f"{namespace}:{scope(*args, **kwargs)}"
+            cache = get_semantic_cache()
+
+            cached = cache.get_exact(namespace, text)
+            if cached is not None:
+                logger.info(f"Exact cache hit in {namespace}")
+                return _decode_result(cached, result_type)
+
+            embedding = await asyncio.to_thread(cache.embed, text)
+            cached = cache.get_similar(namespace, embedding, threshold)
+            if cached is not None:
+                return _decode_result(cached, result_type)
+
+            result = await func(self, *args, **kwargs)
+            cache.store(namespace, text, embedding, _encode_result(result))
+            return result
+        return wrapper
+    return decorator
@@ -1,16 +1,65 @@
 import os
+import asyncio
+import hashlib
+import re
+import time
+from contextlib import asynccontextmanager, suppress
+from functools import partial
+import orjson
 import uvicorn
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, HttpUrl
 from fastapi.middleware.cors import CORSMiddleware
 from news_summary_extractor import ArticleExtractor
 from News_comment_styler import NewsCommentStyler
-from speak import speak
-from fastapi.responses import StreamingResponse
+from speak import speak_segments, OUTPUT_FORMAT, OutputFormat
+from fastapi.responses import FileResponse, Response, StreamingResponse
 import logging
 from urllib.parse import urlparse
+from llm_cache import get_response_cache
+from llm_client import MODEL
+from article_fetcher import fetch_article, fetch_feed_links, shutdown_parse_pool
+from semantic_cache import get_semantic_cache
+from utils import CACHE_DIR, load_env
 
-app = FastAPI()
+load_env()
+
+# How long generated audio for a (url, style) pair is served from cache, in seconds
+AUDIO_CACHE_TTL = 6 * 60 * 60
+# Articles at least this similar to one already voiced in the same style reuse its audio,
+# which catches mirrored wire stories and URLs that differ only in tracking parameters
+ARTICLE_SIMILARITY_THRESHOLD = 0.92
+# Characters of article text compared for near-duplicates. The embedding model only reads
+# 256 wordpieces (about 180 words) at a time, so the text is embedded in chunks that are
+# averaged, and this cap only bounds the CPU spent on very long pages.
+ARTICLE_EMBED_CHARS = 30000
+
+# Feeds whose articles are voiced ahead of time, comma separated, and the styles to voice them in.
+# Their audio is pinned to disk so requests for them are a file read.
+PRECOMPUTE_FEEDS = [feed.strip() for feed in os.getenv("PRECOMPUTE_FEEDS", "").split(",") if feed.strip()]
+PRECOMPUTE_STYLES = [style.strip() for style in os.getenv("PRECOMPUTE_STYLES", "Uwu").split(",") if style.strip()]
+# Newest articles taken from each feed per poll
+PRECOMPUTE_ITEMS_PER_FEED = int(os.getenv("PRECOMPUTE_ITEMS_PER_FEED", "10"))
+# Seconds between feed polls
+PRECOMPUTE_INTERVAL = int(os.getenv("PRECOMPUTE_INTERVAL", str(15 * 60)))
+PINNED_AUDIO_DIR = os.path.join(CACHE_DIR, "audio")
+# Pinned audio older than this is deleted, in seconds, since the news it covers has moved on
+PINNED_AUDIO_MAX_AGE = 24 * 60 * 60
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    precomputing = asyncio.create_task(precompute_feeds()) if PRECOMPUTE_FEEDS else None
+    yield
+    if precomputing is not None:
+        precomputing.cancel()
+        with suppress(asyncio.CancelledError):
+            await precomputing
+    await asyncio.to_thread(shutdown_parse_pool)
+
+app = FastAPI(lifespan=lifespan)
+# Stateless, so one instance serves every request. ArticleExtractor keeps per-article
+# state and is still created per request, but its API clients are shared process-wide.
+styler = NewsCommentStyler()
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -19,9 +68,315 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def audio_cache_key(url: str, style: str, output_format: str) -> str:
+    return "audio:" + hashlib.sha256(f"{url}|{style}|{output_format}|{MODEL}".encode()).hexdigest()
+
+def pinned_audio_path(cache_key: str) -> str:
+    return os.path.join(PINNED_AUDIO_DIR, cache_key.removeprefix("audio:") + ".mp3")
+
+def write_pinned_audio(cache_key: str, audio: bytes):
+    os.makedirs(PINNED_AUDIO_DIR, exist_ok=True)
+    path = pinned_audio_path(cache_key)
+    # Written under a temporary name and renamed, so a request never reads a partial file
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(audio)
+    os.replace(temp_path, path)
+
+def prune_pinned_audio():
+    if not os.path.isdir(PINNED_AUDIO_DIR):
+        return
+    cutoff = time.time() - PINNED_AUDIO_MAX_AGE
+    for entry in os.scandir(PINNED_AUDIO_DIR):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+
+def article_audio_namespace(style: str, output_format: str) -> str:
+    # Versioned, since entries embedded from the lede alone aren't comparable with whole-article ones
+    return f"article_audio_v2:{style.lower()}:{output_format}"
+
+def audio_for_match(match):
+    # The audio a semantic cache entry points to may have expired from the response cache
+    return get_response_cache().get(orjson.loads(match)["audio_key"]) if match is not None else None
+
+async def find_similar_audio(article_text: str, namespace: str):
+    """
+    Look for audio already generated in this style for the same or a near-duplicate article.
+    Returns the audio, or None, together with the article's embedding for storing later.
+    """
+    # The SQLite lookups and writes run in a thread so they don't stall other streams
+    cache = get_semantic_cache()
+    exact = await asyncio.to_thread(cache.get_exact, namespace, article_text)
+    audio = await asyncio.to_thread(audio_for_match, exact)
+    if audio is not None:
+        return audio, None
+    embedding = await asyncio.to_thread(cache.embed_document, article_text)
+    if exact is None:
+        similar = await asyncio.to_thread(cache.get_similar, namespace, embedding, ARTICLE_SIMILARITY_THRESHOLD)
+        audio = await asyncio.to_thread(audio_for_match, similar)
+    return audio, embedding
+
+async def cache_audio(key: str, audio_generator, article_text: str, namespace: str, embedding, cacheable):
+    """
+    Pass audio chunks through, storing the complete MP3 once the stream finishes if
+    cacheable() is then true
+    """
+    chunks = []
+    async for chunk in audio_generator:
+        chunks.append(chunk)
+        yield chunk
+    if not cacheable():
+        return
+    await asyncio.to_thread(get_response_cache().set, key, b"".join(chunks), AUDIO_CACHE_TTL)
+    await asyncio.to_thread(
+        get_semantic_cache().store,
+        namespace, article_text, embedding, orjson.dumps({"audio_key": key}).decode()
+    )
+
+# The end of a sentence: terminal punctuation, any closing quotes or brackets, then whitespace
+SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+")
+
+class TextStream:
+    """Text arriving token by token, read back as runs of complete sentences"""
+    def __init__(self):
+        self.text = ""
+        self.closed = False
+        self.started = asyncio.Event()
+        self._changed = asyncio.Event()
+
+    def push(self, token: str):
+        self.text += token
+        self.started.set()
+        self._notify()
+
+    def close(self, *_):
+        self.closed = True
+        self.started.set()
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def sentences(self):
+        """
+        Yield every complete sentence written so far each time at least one more is ready,
+        so the first sentence can be voiced while the rest is still being generated
+        """
+        read = 0
+        while True:
+            ends = [match.end() for match in SENTENCE_END.finditer(self.text, read)]
+            if ends:
+                if self.text[read:ends[-1]].strip():
+                    yield self.text[read:ends[-1]]
+                read = ends[-1]
+            elif self.closed:
+                if self.text[read:].strip():
+                    yield self.text[read:]
+                return
+            else:
+                await self._changed.wait()
+
+async def single(text: str):
+    yield text
+
+async def narrate(styled_summary: TextStream, styling: asyncio.Task, summarizing: asyncio.Task,
+                  state: dict):
+    """
+    Yield the sections to voice: the styled summary sentence by sentence as it is generated,
+    then the perspective comments once they are written. Falls back to the plain article
+    summary if styling fails before producing any of the styled summary. Sets state["styled"]
+    once the full styled result is out.
+    """
+    await styled_summary.started.wait()
+    if not styled_summary.text:
+        logging.warning(f"Failed to style article: {await styling}")
+        article_summary = await summarizing
+        if not article_summary:
+            raise HTTPException(status_code=400, detail="Failed to generate article summary")
+        yield single(article_summary)
+        return
+    # The plain summary is only the fallback, so stop paying for it
+    summarizing.cancel()
+    yield styled_summary.sentences()
+    
+    styled_result = await styling
+    # Check if styled_result is an error message (string) or lacks the comments
+    if not isinstance(styled_result, dict) or "styled_comments" not in styled_result:
+        logging.warning(f"Failed to generate perspective comments: {styled_result}")
+        return
+    comments = "Perspectives:\n"
+    for perspective, comment in styled_result['styled_comments'].items():
+        comments += f"\n{perspective}: {comment}\n"
+    state["styled"] = True
+    yield single(comments)
+
+async def prepend(first_chunk: bytes, audio_generator):
+    yield first_chunk
+    async for chunk in audio_generator:
+        yield chunk
+
+class AudioBroadcast:
+    """
+    Audio chunks from one pipeline, replayed from the start to every request for the same
+    article and style. The pipeline runs to completion even if its first listener disconnects.
+    """
+    def __init__(self, audio_generator):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._changed = asyncio.Event()
+        self.pumping = asyncio.create_task(self._pump(audio_generator))
+
+    async def _pump(self, audio_generator):
+        try:
+            async for chunk in audio_generator:
+                self.chunks.append(chunk)
+                self._notify()
+        except Exception as e:
+            logging.error(f"Error generating audio: {e}")
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def listen(self):
+        sent = 0
+        while True:
+            while sent < len(self.chunks):
+                yield self.chunks[sent]
+                sent += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+# Pipelines currently generating audio, keyed like the audio cache, so concurrent requests
+# for the same article and style share one set of LLM and TTS calls
+_inflight: dict[str, asyncio.Task] = {}
+
+def _release_inflight(key: str, task: asyncio.Task):
+    """Forget a finished pipeline, or once a streaming one has finished producing audio"""
+    if not task.cancelled() and task.exception() is None and isinstance(task.result(), AudioBroadcast):
+        broadcast = task.result()
+        if not broadcast.done:
+            broadcast.pumping.add_done_callback(lambda _: _inflight.pop(key, None))
+            return
+    _inflight.pop(key, None)
+
+AUDIO_HEADERS = {
+    "Content-Type": "audio/mpeg",
+    "Content-Disposition": "attachment; filename=speech.mp3"
+}
+
+async def generate_audio(news_url: str, style: str, output_format: str, cache_key: str):
+    """
+    Run the pipeline for an article and style, returning either the complete audio of a
+    near-duplicate article or an AudioBroadcast of the newly generated audio
+    """
+    # Near-duplicate articles under other URLs skip every LLM and TTS call too
+    article = await fetch_article(news_url)
+    article_text = article.text[:ARTICLE_EMBED_CHARS]
+    namespace = article_audio_namespace(style, output_format)
+    similar_audio, embedding = await find_similar_audio(article_text, namespace)
+    if similar_audio is not None:
+        logging.info(f"Reusing audio of a near-duplicate article for {news_url} ({style})")
+        # So later requests for this URL are a cache hit without fetching and embedding again
+        await asyncio.to_thread(get_response_cache().set, cache_key, similar_audio, AUDIO_CACHE_TTL)
+        return similar_audio
+        
+    # Summarize (the fallback) and style the downloaded article side by side, and start
+    # voicing the styled summary from its first sentence while the rest of it and the
+    # comments are still being written
+    article_extractor = ArticleExtractor()
+    summarizing = asyncio.create_task(article_extractor(article))
+    styled_summary = TextStream()
+    styling = asyncio.create_task(styler.analyze_and_style_article(
+        article, style, on_styled_summary=styled_summary.close, on_token=styled_summary.push
+    ))
+    # Also ends the stream if styling fails partway through the styled summary
+    styling.add_done_callback(styled_summary.close)
+    narration_state = {"styled": False}
+    audio_generator = speak_segments(
+        narrate(styled_summary, styling, summarizing, narration_state), output_format
+    )
+    
+    # Wait for the first audio chunk, so failures before any audio is sent still become an HTTP error
+    try:
+        first_chunk = await anext(audio_generator)
+    except StopAsyncIteration:
+        raise HTTPException(status_code=500, detail="Failed to generate audio")
+    
+    # Only cache the full styled result, so a transient styling failure isn't served for hours
+    audio_generator = cache_audio(
+        cache_key, prepend(first_chunk, audio_generator), article_text, namespace, embedding,
+        cacheable=lambda: narration_state["styled"]
+    )
+    return AudioBroadcast(audio_generator)
+
+def start_generation(news_url: str, style: str, output_format: str, cache_key: str) -> asyncio.Task:
+    """
+    Start the pipeline for an article and style, or return the one already running, so
+    concurrent requests for the same article and style share one set of LLM and TTS calls
+    """
+    generating = _inflight.get(cache_key)
+    if generating is None:
+        generating = asyncio.create_task(generate_audio(news_url, style, output_format, cache_key))
+        _inflight[cache_key] = generating
+        generating.add_done_callback(partial(_release_inflight, cache_key))
+    else:
+        logging.info(f"Joining in-flight audio generation for {news_url} ({style})")
+    return generating
+
+async def precompute_audio(news_url: str, style: str):
+    """Voice an article ahead of any request for it and pin the audio to disk"""
+    cache_key = audio_cache_key(news_url, style, OUTPUT_FORMAT)
+    if os.path.exists(pinned_audio_path(cache_key)):
+        return
+    audio = await asyncio.to_thread(get_response_cache().get, cache_key)
+    if audio is None:
+        # Shielded, since live requests may have joined this pipeline and must not lose it
+        # when precomputing is cancelled
+        audio = await asyncio.shield(start_generation(news_url, style, OUTPUT_FORMAT, cache_key))
+        if isinstance(audio, AudioBroadcast):
+            await asyncio.shield(audio.pumping)
+            # Only audio of the full styled result reaches the audio cache, and only that is pinned
+            audio = await asyncio.to_thread(get_response_cache().get, cache_key)
+    if audio is None:
+        logging.warning(f"Not pinning incomplete audio for {news_url} ({style})")
+        return
+    await asyncio.to_thread(write_pinned_audio, cache_key, audio)
+    logging.info(f"Pinned audio for {news_url} ({style})")
+
+async def precompute_feeds():
+    """Poll PRECOMPUTE_FEEDS and voice their newest articles in each of PRECOMPUTE_STYLES"""
+    while True:
+        await asyncio.to_thread(prune_pinned_audio)
+        for feed_url in PRECOMPUTE_FEEDS:
+            try:
+                links = (await fetch_feed_links(feed_url))[:PRECOMPUTE_ITEMS_PER_FEED]
+            except Exception as e:
+                logging.error(f"Error reading feed {feed_url}: {e}")
+                continue
+            # One article at a time, so precomputing doesn't crowd out live requests
+            for news_url in links:
+                for style in PRECOMPUTE_STYLES:
+                    try:
+                        await precompute_audio(news_url, style)
+                    except Exception as e:
+                        logging.error(f"Error precomputing audio for {news_url} ({style}): {e}")
+        await asyncio.sleep(PRECOMPUTE_INTERVAL)
+
 class URLData(BaseModel):
     url: HttpUrl  # This ensures URL validation
     style: str = "Uwu"  # Default style if none provided
+    # Higher bitrates for clients that want them; the default is plenty for speech
+    output_format: OutputFormat = OUTPUT_FORMAT
 
 @app.post("/api/data")
 async def process_everything(request_data: URLData):
@@ -32,45 +387,26 @@ async def process_everything(request_data: URLData):
         parsed_url = urlparse(news_url)
         if parsed_url.scheme not in ['http', 'https']:
             raise HTTPException(status_code=400, detail="Only HTTP and HTTPS URLs are supported")
-            
-        # Extract and summarize article
-        article_extractor = ArticleExtractor()
-        article_summary = await article_extractor(news_url)
         
-        if not article_summary:
-            raise HTTPException(status_code=400, detail="Failed to generate article summary")
-        
-        # Style the article summary
-        styler = NewsCommentStyler()
-        styled_result = await styler.analyze_and_style_article(news_url, request_data.style)
-        
-        # Check if styled_result is an error message (string) or None
-        if not styled_result or isinstance(styled_result, str):
-            error_msg = styled_result if isinstance(styled_result, str) else "Unknown styling error"
-            logging.warning(f"Failed to style article: {error_msg}")
-            final_summary = article_summary
-        else:
-            try:
-                final_summary = f"{styled_result['styled_summary']}\n\nPerspectives:\n"
-                for perspective, comment in styled_result['styled_comments'].items():
-                    final_summary += f"\n{perspective}: {comment}\n"
-            except KeyError as e:
-                logging.error(f"Unexpected response format from styler: {e}")
-                final_summary = article_summary
+        # Repeat requests for the same article and style skip every remote call, and
+        # articles voiced ahead of time are served straight from disk
+        cache_key = audio_cache_key(news_url, request_data.style, request_data.output_format)
+        pinned_path = pinned_audio_path(cache_key)
+        if os.path.exists(pinned_path):
+            logging.info(f"Serving pinned audio for {news_url} ({request_data.style})")
+            return FileResponse(pinned_path, media_type="audio/mpeg", headers=AUDIO_HEADERS)
+        cached_audio = await asyncio.to_thread(get_response_cache().get, cache_key)
+        if cached_audio is not None:
+            logging.info(f"Audio cache hit for {news_url} ({request_data.style})")
+            return Response(cached_audio, media_type="audio/mpeg", headers=AUDIO_HEADERS)
         
-        # Generate audio
-        audio_generator = await speak(final_summary)
-        if not audio_generator:
-            raise HTTPException(status_code=500, detail="Failed to generate audio")
-            
-        return StreamingResponse(
-            audio_generator,
-            media_type="audio/mpeg",
-            headers={
-                "Content-Type": "audio/mpeg",
-                "Content-Disposition": "attachment; filename=speech.mp3"
-            }
-        )
+        # Concurrent requests for the same article and style join the pipeline already running
+        generating = start_generation(news_url, request_data.style, request_data.output_format, cache_key)
+        # Shielded, so one client disconnecting doesn't cancel the pipeline for the others
+        audio = await asyncio.shield(generating)
+        if isinstance(audio, bytes):
+            return Response(audio, media_type="audio/mpeg", headers=AUDIO_HEADERS)
+        return StreamingResponse(audio.listen(), media_type="audio/mpeg", headers=AUDIO_HEADERS)
     except Exception as e:
         logging.error(f"Error in process_everything: {str(e)}")
         if isinstance(e, HTTPException):
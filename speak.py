@@ -1,21 +1,114 @@
-from elevenlabs.client import ElevenLabs, Voice, VoiceSettings
-from dotenv import load_dotenv
+from elevenlabs.client import AsyncElevenLabs, Voice, VoiceSettings
 from logger import logging
-import os
 import asyncio
-from utils import timing
+import os
+from typing import Literal, get_args
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+from utils import load_env, run
 import io
 from Classify_commenter import CommentVoiceMatcher
 
-load_dotenv()
+load_env()
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
+# MP3 formats audio can be requested in
+OutputFormat = Literal["mp3_22050_32", "mp3_44100_64", "mp3_44100_128"]
+# 22.05 kHz at 32 kbps is indistinguishable from 44.1 kHz at 128 kbps for speech,
+# at a quarter of the bytes to synthesize and stream
+OUTPUT_FORMAT = os.getenv("ELEVENLABS_OUTPUT_FORMAT", "mp3_22050_32")
+# Checked here since it is also the API's default, which pydantic doesn't validate,
+# and would otherwise reach ElevenLabs and every audio cache key unchecked
+if OUTPUT_FORMAT not in get_args(OutputFormat):
+    raise ValueError(
+        f"ELEVENLABS_OUTPUT_FORMAT must be one of {', '.join(get_args(OutputFormat))}, got {OUTPUT_FORMAT!r}"
+    )
+DEFAULT_VOICE_ID = "onwK4e9ZLuTAKqWW03F9"
+# Upper bound on ElevenLabs streams open at once, kept under the plan's concurrency limit
+# so bursts queue here instead of coming back as 429s
+ELEVENLABS_MAX_CONCURRENCY = int(os.getenv("ELEVENLABS_MAX_CONCURRENCY", "5"))
+
+_TTS_SEM = asyncio.Semaphore(ELEVENLABS_MAX_CONCURRENCY)
+
+# The CommentVoiceMatcher is created once, on first use, and its voices fetched by ready()
+voice_matcher = None
+# One ElevenLabs client per process, so every request shares its connection pool
+tts_client = None
+
+
+async def get_voice_matcher() -> CommentVoiceMatcher:
+    global voice_matcher
+    # Assigned before any await, so concurrent first requests share one matcher, and its
+    # ready() is guarded by a lock so the voices are only fetched once
+    if voice_matcher is None:
+        voice_matcher = CommentVoiceMatcher()
+    await voice_matcher.ready()
+    return voice_matcher
+
+
+def get_tts_client() -> AsyncElevenLabs:
+    global tts_client
+    if tts_client is None:
+        tts_client = AsyncElevenLabs(api_key=ELEVENLABS_API_KEY)
+    return tts_client
+
+
+def _is_rate_limit(error: BaseException) -> bool:
+    from elevenlabs.core import ApiError
+    return isinstance(error, ApiError) and error.status_code == 429
+
+
+@retry(
+    retry=retry_if_exception(_is_rate_limit),
+    wait=wait_random_exponential(min=1, max=30),
+    stop=stop_after_attempt(6),
+    reraise=True
+)
+async def _open_audio_stream(request: dict):
+    """
+    Start a TTS stream and wait for its first chunk, which is when a rate limit shows up,
+    retrying with backoff if rate limited. Returns an async iterator over all the chunks.
+    Each attempt takes a concurrency slot, released here if it fails so backing off doesn't
+    hold one; on success the caller releases it once the stream is done.
+    """
+    await _TTS_SEM.acquire()
+    try:
+        audio_stream = aiter(await get_tts_client().generate(**request))
+        first_chunk = await anext(audio_stream, None)
+    except BaseException:
+        _TTS_SEM.release()
+        raise
+
+    async def chunks():
+        if first_chunk is not None:
+            yield first_chunk
+        async for chunk in audio_stream:
+            yield chunk
 
-# Initialize the CommentVoiceMatcher once
-voice_matcher = CommentVoiceMatcher()
+    return chunks()
 
 
-@timing
-async def speak(text: str):
+async def pick_voice(text: str) -> str:
+    """Choose the voice that best fits the perspective of the text"""
+    try:
+        voice_matcher = await get_voice_matcher()
+        personas = await voice_matcher.get_relevant_personas(text)
+        if not personas:
+            logging.warning("No perspectives found, using default voice")
+            return DEFAULT_VOICE_ID
+        # Use the first perspective for now
+        persona = personas[0]
+        matched_voice = voice_matcher.find_best_matching_voice(persona)
+        if matched_voice is None:
+            logging.warning(f"No voice matches perspective: {persona.perspective}, using default voice")
+            return DEFAULT_VOICE_ID
+        logging.info(f"Selected voice: {matched_voice.name} ({matched_voice.voice_id}) for perspective: {persona.perspective}")
+        return matched_voice.voice_id
+    except Exception as e:
+        logging.error(f"Error getting voice recommendation: {e}")
+        return DEFAULT_VOICE_ID  # Fallback to default voice
+
+
+async def speak(text: str, output_format: str = OUTPUT_FORMAT, voice_id: str = None):
+    """Voice text, in voice_id if given and otherwise in a voice picked for the text"""
     try:
         if not ELEVENLABS_API_KEY:
             raise ValueError("ELEVENLABS_API_KEY not found in environment variables")
@@ -29,57 +122,36 @@ async def speak(text: str):
             
         logging.info(f"Generating audio for text (first 10000 chars): {text[:10000]}...")
         
-        # Get voice recommendation
-        try:
-            perspectives = await voice_matcher.get_relevant_perspectives(text)
-            if not perspectives:
-                logging.warning("No perspectives found, using default voice")
-                custom_voice_id = "onwK4e9ZLuTAKqWW03F9"  # Default voice
-            else:
-                # Use the first perspective for now
-                persona = voice_matcher.analyze_perspective(perspectives[0])
-                matched_voice = voice_matcher.find_best_matching_voice(persona)
-                custom_voice_id = matched_voice.voice_id
-                logging.info(f"Selected voice: {matched_voice.name} ({custom_voice_id}) for perspective: {perspectives[0]}")
-        except Exception as e:
-            logging.error(f"Error getting voice recommendation: {e}")
-            custom_voice_id = "onwK4e9ZLuTAKqWW03F9"  # Fallback to default voice
+        custom_voice_id = voice_id or await pick_voice(text)
         
-        client = ElevenLabs(
-            api_key=ELEVENLABS_API_KEY
-        )
-
-        # Generate audio with correct output format
-        try:
-            audio_stream = client.generate(
-                text=text,
-                voice=Voice(
-                    voice_id=custom_voice_id,
-                    settings=VoiceSettings(
-                        stability=0.5,
-                        similarity_boost=0.75,
-                        style=0.0,
-                        use_speaker_boost=False,
-                    ),
+        request = dict(
+            text=text,
+            voice=Voice(
+                voice_id=custom_voice_id,
+                settings=VoiceSettings(
+                    stability=0.5,
+                    similarity_boost=0.75,
+                    style=0.0,
+                    use_speaker_boost=False,
                 ),
-                model="eleven_turbo_v2_5",
-                output_format="mp3_44100_128"  # High-quality MP3 format
-            )
-        except Exception as e:
-            logging.error(f"ElevenLabs API error: {e}")
-            raise ValueError(f"Failed to generate audio: {str(e)}")
+            ),
+            model="eleven_turbo_v2_5",
+            output_format=output_format
+        )
         
-        # Create an async generator for streaming
+        # A native async generator, so StreamingResponse consumes it on the event loop
+        # instead of handing each chunk of a sync iterator to the threadpool. The stream
+        # holds a concurrency slot from its request until its last chunk.
         async def audio_generator():
             try:
-                # If audio_stream is already bytes, yield it directly
-                if isinstance(audio_stream, bytes):
-                    yield audio_stream
-                    return
-                    
-                # If it's a generator or iterator, yield chunks
+                audio_stream = await _open_audio_stream(request)
+            except Exception as e:
+                logging.error(f"ElevenLabs API error: {e}")
+                raise ValueError(f"Failed to generate audio: {str(e)}")
+            
+            try:
                 chunk_count = 0
-                for chunk in audio_stream:  # Regular for loop instead of async for
+                async for chunk in audio_stream:
                     if chunk:
                         chunk_count += 1
                         yield chunk
@@ -92,6 +164,8 @@ async def speak(text: str):
             except Exception as e:
                 logging.error(f"Error in audio generator: {e}")
                 raise ValueError(f"Audio streaming error: {str(e)}")
+            finally:
+                _TTS_SEM.release()
 
         return audio_generator()
 
@@ -100,5 +174,26 @@ async def speak(text: str):
         raise  # Re-raise the exception to handle it at a higher level
 
 
+
+async def speak_segments(sections, output_format: str = OUTPUT_FORMAT):
+    """
+    Voice sections of text from an async iterator one after another. Each section is itself
+    an async iterator of text pieces read in one voice, and each piece's audio streams as soon
+    as it is ready while later pieces are still being written. The first section is read in
+    the default voice so nothing holds up the first audio; later sections get a voice picked
+    from their first piece.
+    """
+    first_section = True
+    async for section in sections:
+        voice_id = DEFAULT_VOICE_ID if first_section else None
+        first_section = False
+        async for text in section:
+            if voice_id is None:
+                voice_id = await pick_voice(text)
+            audio = await speak(text, output_format, voice_id)
+            async for chunk in audio:
+                yield chunk
+
+
 if __name__ == "__main__":
-    asyncio.run(speak("e money \"derived substantially the whole of its value from the activities of Mr Grint\", which was \"otherwise realised\" as income.\n\nHe previously lost another, separate court case in 2019 that involved a £1m tax refund.\n\nGrint appeared in all eight Harry Potter films from 2001 until 2011.\n\nSince then, he has appeared in the films Into the White and Knock at the Cabin, and also appeared on TV and in theatre.\n\nHe has starred in Apple TV series Servant for the last four years."))
\ No newline at end of file
+    run(speak("e money \"derived substantially the whole of its value from the activities of Mr Grint\", which was \"otherwise realised\" as income.\n\nHe previously lost another, separate court case in 2019 that involved a £1m tax refund.\n\nGrint appeared in all eight Harry Potter films from 2001 until 2011.\n\nSince then, he has appeared in the films Into the White and Knock at the Cabin, and also appeared on TV and in theatre.\n\nHe has starred in Apple TV series Servant for the last four years."))
\ No newline at end of file
@@ -1,22 +1,31 @@
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
-import asyncio
-from utils import timing
-load_dotenv()
+from openai import AsyncOpenAI
+from utils import timing, load_env, run
+load_env()
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
 from logger import logging
 
+# One Groq client per process, shared by every TextSummary so requests reuse its connections
+_groq_client = None
+
+
+def get_groq_client() -> AsyncOpenAI:
+    global _groq_client
+    if _groq_client is None:
+        logging.info("Initializing Groq client")
+        _groq_client = AsyncOpenAI(
+            base_url="https://api.groq.com/openai/v1",
+            api_key=GROQ_API_KEY.strip(),  # Ensure no whitespace
+        )
+    return _groq_client
+
+
 class TextSummary():
     def __init__(self, model="gemma2-9b-it"):
         if not GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY not found in environment variables")
         
-        logging.info(f"Initializing Groq client with model: {model}")
-        self.client = OpenAI(
-            base_url="https://api.groq.com/openai/v1",
-            api_key=GROQ_API_KEY.strip(),  # Ensure no whitespace
-        )
+        self.client = get_groq_client()
         self.model = model
 
     @timing
@@ -32,7 +41,7 @@ class TextSummary():
             logging.info(f"Article length: {len(article)} characters")
             
             # Improved prompt for better summarization
-            chat_completion = self.client.chat.completions.create(
+            chat_completion = await self.client.chat.completions.create(
                 messages=[
                     {
                         "role": "system",
@@ -121,4 +130,4 @@ In fall 2012, Podimetrics entered Rock Health — a major digital-health startup
 In the incubator, Podimetrics created an early prototype — a mat with large sensors and a circuit board sticking out, all held together with electric tape — and took it through a series of clinical trials. The startup then relocated to its current headquarters in Somerville, Massachusetts, where it refined the prototype into its commercial iteration. In the past five years, the startup has raised more than $8 million in funding.  
 
 The startup is scaling up and aiming to get into many more homes in the coming year. It’s also starting a new set of studies to measure the cost and health outcomes associated with the mat. “Now we’re focused on gathering more data, continuing to build on data we have, and learning the best environment where we can help,” Bloom says."""
-    asyncio.run(summary(text))
\ No newline at end of file
+    run(summary(text))
\ No newline at end of file
@@ -1,5 +1,8 @@
 
-from functools import wraps
+import asyncio
+import atexit
+import os
+from functools import lru_cache, wraps
 import time
 
 
@@ -11,4 +14,36 @@ def timing(func):
         end_time = time.time()
         print(f"{func.__name__} took {end_time - start_time:.4f} seconds")
         return result
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+@lru_cache(maxsize=None)
+def load_env():
+    """Load .env into the environment once per process, however many modules ask for it"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+# Shared on-disk cache location for expensive lookups
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sons_of_anton")
+
+
+_runner = None
+
+
+def run(coro):
+    """
+    Run a coroutine to completion on a process-wide event loop, using uvloop when it is
+    installed. Unlike asyncio.run the loop is kept between calls, so scripts that run several
+    coroutines reuse it along with the shared API clients and semaphores bound to it.
+    """
+    global _runner
+    if _runner is None:
+        try:
+            import uvloop
+            loop_factory = uvloop.new_event_loop
+        except ImportError:
+            loop_factory = None
+        _runner = asyncio.Runner(loop_factory=loop_factory)
+        atexit.register(_runner.close)
+    return _runner.run(coro)